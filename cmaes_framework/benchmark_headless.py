@@ -0,0 +1,80 @@
+"""
+Benchmarks headless fitness evaluations, the kind CMA-ES runs for every genome.
+Times `run_simulation.run` in mode "h", which never creates an EvoViewer, and
+the viewer setup and teardown every evaluation used to pay on top of that.
+
+Example: `python3 benchmark_headless.py --evals 20 --iters 1000`
+
+October 18th, 2026
+"""
+
+import argparse
+import time
+import numpy as np
+from evogym import EvoSim, EvoViewer
+from snn_sim import run_simulation
+
+
+def benchmark(evals, iters, hidden_sizes, seed=0):
+    """
+    Times headless evaluations of random genomes and the viewer setup they skip.
+
+    Parameters:
+        evals (int): Number of evaluations to time.
+        iters (int): Simulation steps per evaluation.
+        hidden_sizes (list): List of numbers of nodes in hidden layers.
+        seed (int): Seed of the random genomes.
+
+    Returns:
+        dict: Mean seconds per evaluation of the headless run ("headless") and of
+              creating, tracking with and closing a viewer ("viewer").
+    """
+    rng = np.random.default_rng(seed)
+    context = run_simulation.get_evaluation_context(hidden_sizes)
+    controller = run_simulation.build_controller(hidden_sizes, max_steps=iters)
+    genomes = rng.normal(size=(evals, context.layout.genome_length))
+
+    # Warm up, so one-time setup isn't timed
+    run_simulation.run(iters, genomes[0], "h", hidden_sizes,
+                       snn_controller=controller, context=context)
+
+    start = time.perf_counter()
+    for genome in genomes:
+        run_simulation.run(iters, genome, "h", hidden_sizes,
+                           snn_controller=controller, context=context)
+    headless = (time.perf_counter() - start) / evals
+
+    sim = EvoSim(context.world)
+    start = time.perf_counter()
+    for _ in range(evals):
+        viewer = EvoViewer(sim)
+        viewer.track_objects('robot')
+        viewer.close()
+    viewer_cost = (time.perf_counter() - start) / evals
+
+    return {"headless": headless, "viewer": viewer_cost}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Headless evaluation benchmark')
+    parser.add_argument('--evals',
+                        type=int,
+                        default=20,
+                        help='number of evaluations to time')
+    parser.add_argument('--iters',
+                        type=int,
+                        default=1000,
+                        help='simulation steps per evaluation')
+    parser.add_argument('--hidden_sizes',
+                        type=int,
+                        nargs='+',
+                        default=[2],
+                        help='list of hidden layer sizes')
+    args = parser.parse_args()
+
+    results = benchmark(args.evals, args.iters, args.hidden_sizes)
+    headless = results["headless"]
+    viewer = results["viewer"]
+    print(f"Headless evaluation: {headless * 1000:.1f} ms")
+    print(f"Viewer setup skipped per evaluation: {viewer * 1000:.1f} ms "
+          f"({viewer / (headless + viewer):.1%} of an evaluation with a viewer)")
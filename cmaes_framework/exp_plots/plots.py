@@ -9,36 +9,86 @@ April 16th, 2025
 """
 
 import os
+import sys
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.cm import *
 from pathlib import Path
 
-def load_logs(file_path):
-    """Load CSV log data."""
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from snn.snn_log import SNNLog, LOG_NAMES, is_snn_log
+from snn.log_index import CSVLog
+
+# Logs that fetch single neurons without scanning the whole file
+INDEXED_LOGS = (SNNLog, CSVLog)
+
+def load_logs(file_path, indexed=False):
+    """Load CSV log data, or open a binary .snnlog log.
+    With indexed=True, CSV logs are opened through an offset table instead, so plots
+    read only the neurons they show and repeated plots are cached."""
+    if is_snn_log(file_path):
+        return SNNLog(file_path)
+    if indexed:
+        return CSVLog(file_path)
     return pd.read_csv(file_path)
 
 
+def _neuron_log(df, log_type, snn_id, layer, neuron_id):
+    """Get one log of one neuron from a dataframe, SNNLog or CSVLog, None if it wasn't logged."""
+    if isinstance(df, INDEXED_LOGS):
+        if not df.has(log_type, snn_id, layer, neuron_id):
+            return None
+        return df.get(log_type, snn_id, layer, neuron_id)
+
+    row = df[(df['SNN'] == snn_id) &
+             (df['layer'] == layer) &
+             (df['neuron'] == neuron_id) &
+             (df['log'] == log_type)]
+    if row.empty:
+        return None
+    return row.iloc[0, 4:].astype(float).values
+
+
+def _snn_logs(df, log_type, snn_id):
+    """Get (layer, neuron, log) for every neuron of an SNN from a dataframe, SNNLog or CSVLog."""
+    if isinstance(df, INDEXED_LOGS):
+        if log_type not in df.log_names:
+            return []
+        return [(layer, neuron, df.get(log_type, snn, layer, neuron))
+                for snn, layer, neuron in df.neurons(snn_id)]
+
+    snn_df = df[(df['SNN'] == snn_id) & (df['log'] == log_type)]
+    return [(row['layer'], row['neuron'], row.iloc[4:].astype(float).values)
+            for _, row in snn_df.iterrows()]
+
+
+def _snn_spike_times(df, snn_id):
+    """Get (layer, neuron, spike steps) for every neuron of an SNN, read from the packed fire log of an SNNLog."""
+    if isinstance(df, INDEXED_LOGS):
+        if 'firelog' not in df.log_names:
+            return []
+        return [(layer, neuron, df.spike_times(snn, layer, neuron))
+                for snn, layer, neuron in df.neurons(snn_id)]
+
+    return [(layer, neuron, np.flatnonzero(spikes > 0))
+            for layer, neuron, spikes in _snn_logs(df, 'firelog', snn_id)]
+
+
 def plot_neuron_logs(df, xlim, snn_id, layer, neuron_id):
-    """Plot logs for a specific neuron from dataframe."""
-    
-    neuron_df = df[(df['SNN'] == snn_id) &
-                   (df['layer'] == layer) &
-                   (df['neuron'] == neuron_id)]
+    """Plot logs for a specific neuron from dataframe, SNNLog or CSVLog."""
+
+    logs = {}
+    for log_type in LOG_NAMES:
+        logs[log_type] = _neuron_log(df, log_type, snn_id, layer, neuron_id)
 
-    if neuron_df.empty:
+    if all(log is None for log in logs.values()):
         print("No data found for this neuron.")
         return
 
-    logs = {}
-    for log_type in ['levellog', 'firelog', 'dutycyclelog']:
-        row = neuron_df[neuron_df['log'] == log_type]
-        if not row.empty:
-            logs[log_type] = row.iloc[0, 4:].astype(float).values
-        else:
-            logs[log_type] = None
-
     steps = range(len(logs['levellog']))
 
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), sharex=True, gridspec_kw={'height_ratios': [3, 1]})
@@ -72,11 +122,12 @@ def plot_neuron_logs(df, xlim, snn_id, layer, neuron_id):
     plt.show()
 
 def plot_snn_spiketrains(df, xlim, snn_id):
-    """Plot spike trains for all neurons in an SNN with colored lines per neuron."""
-    snn_df = df[(df['SNN'] == snn_id) & (df['log'] == 'firelog')]
-    snn_df = snn_df.sort_values(by=['layer', 'neuron']).reset_index(drop=True)
+    """Plot spike trains for all neurons in an SNN with colored lines per neuron.
+    Takes a dataframe, SNNLog or CSVLog, like the other SNN plots."""
+    neuron_logs = sorted(_snn_spike_times(df, snn_id),
+                         key=lambda neuron_log: neuron_log[:2])
 
-    num_neurons = len(snn_df)
+    num_neurons = len(neuron_logs)
     palette = sns.color_palette("husl", num_neurons)
 
     plt.figure(figsize=(12, num_neurons * 0.5 + 2))
@@ -84,13 +135,11 @@ def plot_snn_spiketrains(df, xlim, snn_id):
     yticks = []
     yticklabels = []
 
-    for idx, (_, row) in enumerate(snn_df.iterrows()):
-        spikes = row.iloc[4:].astype(float).values
-        spike_steps = [i for i, v in enumerate(spikes) if v > 0]
+    for idx, (layer, neuron, spike_steps) in enumerate(neuron_logs):
         plt.vlines(spike_steps, idx, idx + 1, color=palette[idx], linewidth=1.5)
 
         yticks.append(idx + 0.5)
-        yticklabels.append(f"{row['layer']}-{row['neuron']}")
+        yticklabels.append(f"{layer}-{neuron}")
 
     plt.yticks(yticks, yticklabels)
     plt.xlabel('Timestep')
@@ -103,13 +152,10 @@ def plot_snn_spiketrains(df, xlim, snn_id):
 
 def plot_snn_activation_levels(df, xlim, snn_id):
     """Plot activation levels for all neurons in an SNN."""
-    snn_df = df[(df['SNN'] == snn_id) & (df['log'] == 'levellog')]
-
     plt.figure(figsize=(12, 6))
 
-    for _, row in snn_df.iterrows():
-        levels = row.iloc[4:].astype(float).values
-        label = f"{row['layer']}-{row['neuron']}"
+    for layer, neuron, levels in _snn_logs(df, 'levellog', snn_id):
+        label = f"{layer}-{neuron}"
         plt.plot(levels, label=label, alpha=0.7)
 
     plt.title(f'SNN {snn_id} Activation Levels')
@@ -124,13 +170,10 @@ def plot_snn_activation_levels(df, xlim, snn_id):
 
 def plot_snn_dutycycles(df, xlim, snn_id):
     """Plot duty cycles for all neurons in an SNN."""
-    snn_df = df[(df['SNN'] == snn_id) & (df['log'] == 'dutycyclelog')]
-
     plt.figure(figsize=(12, 6))
 
-    for _, row in snn_df.iterrows():
-        duty = row.iloc[4:].astype(float).values
-        label = f"{row['layer']}-{row['neuron']}"
+    for layer, neuron, duty in _snn_logs(df, 'dutycyclelog', snn_id):
+        label = f"{layer}-{neuron}"
         plt.plot(duty, label=label, alpha=0.7)
 
     plt.title(f'SNN {snn_id} Duty Cycles')
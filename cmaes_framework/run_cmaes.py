@@ -23,7 +23,6 @@ from cmaes import SepCMA
 import numpy as np
 from snn_sim import run_simulation
 from snn.model_struct import SPIKE_DECAY_DEFAULT
-import snn.snn_controller as snn_controller
 
 
 def is_windows():
@@ -66,7 +65,9 @@ def run(mode,
         spike_decay=SPIKE_DECAY_DEFAULT,
         robot_config_path=ROBOT_CONFIG_PATH_DEFAULT,
         snn_input_method=SNN_INPUT_METHOD_DEFAULT,
-        scale_snn_inputs=DEFAULT_SCALE_SNN_INPUTS):
+        scale_snn_inputs=DEFAULT_SCALE_SNN_INPUTS,
+        frame_skip=1,
+        video_scale=1.0):
     """
     Runs the cma_es algorithm on the robot locomotion problem,
     with sin-like robot actuators. Saves a csv file to ./output
@@ -84,13 +85,18 @@ def run(mode,
         snn_input_method (str): How SNN inputs are computed. 
                           Options are ["corners", "all_actuators"]
         scale_inputs (bool): Whether or not to scale SNN inputs.
+        frame_skip (int): Only render every frame_skip-th step of the per-generation
+                          simulations in modes s, v and b.
+        video_scale (float): Factor to resize the per-generation videos by.
     """
 
-    robot_path = os.path.join(ROOT_DIR, "snn_sim", "robot", "world_data",
-                              robot_config_path)
+    # World, robot and genome layout, parsed once and reused by every evaluation
+    context = run_simulation.get_evaluation_context(hidden_sizes,
+                                                    robot_config_path,
+                                                    snn_input_method)
 
-    NUM_ACTUATORS, SNN_INPUT_SHAPE = snn_controller.compute_genome_size(
-        robot_path, snn_input_method, HIDDEN_SIZES)
+    NUM_ACTUATORS = context.layout.num_snn
+    SNN_INPUT_SHAPE = context.layout.genome_length
 
     # Mean genome
     MEAN_ARRAY = [0.0] * SNN_INPUT_SHAPE
@@ -146,6 +152,28 @@ def run(mode,
 
     best_fitness_so_far = run_simulation.FITNESS_OFFSET
 
+    # One controller, reset for every genome, instead of one per evaluation
+    controller = run_simulation.build_controller(hidden_sizes,
+                                                 robot_config_path,
+                                                 snn_input_method,
+                                                 spike_decay,
+                                                 max_steps=ITERS)
+
+    # Evaluations reset one simulation instead of building one per genome, as long as
+    # that gives the same fitness, checked on a genome like the first generation's
+    check_genome = np.random.default_rng(run_number).normal(
+        MEAN_ARRAY, sigma_val)
+    reuse_sim = run_simulation.check_sim_reuse(ITERS,
+                                               check_genome,
+                                               hidden_sizes,
+                                               spike_decay=spike_decay,
+                                               scale_snn_inputs=scale_snn_inputs,
+                                               snn_controller=controller,
+                                               context=context)
+    if not reuse_sim:
+        print("Warning: reset simulations don't reproduce fitness, "
+              "building a new simulation for every genome")
+
     # Run generations
     for generation in range(gens):
         solutions = []
@@ -165,7 +193,10 @@ def run(mode,
                 robot_config=robot_config_path,
                 spike_decay=spike_decay,
                 snn_input_method=snn_input_method,
-                scale_snn_inputs=scale_snn_inputs)  # get fitness
+                scale_snn_inputs=scale_snn_inputs,
+                snn_controller=controller,
+                context=context,
+                reuse_sim=reuse_sim)  # get fitness
             solutions.append((x, fitness))
 
         optimizer.tell(solutions)  # Tell cmaes about population
@@ -208,8 +239,13 @@ def run(mode,
                                hidden_sizes,
                                vid_name,
                                vid_path,
+                               spike_decay=spike_decay,
                                snn_input_method=snn_input_method,
-                               scale_snn_inputs=scale_snn_inputs)
+                               scale_snn_inputs=scale_snn_inputs,
+                               context=context,
+                               reuse_sim=reuse_sim,
+                               frame_skip=frame_skip,
+                               video_scale=video_scale)
 
 
 if __name__ == "__main__":
@@ -231,6 +267,14 @@ if __name__ == "__main__":
                         nargs='+',
                         default=[2],
                         help='list of hidden layer sizes')
+    parser.add_argument('--frame_skip',
+                        type=int,
+                        default=1,
+                        help='render every k-th step in modes s, v and b')
+    parser.add_argument('--video_scale',
+                        type=float,
+                        default=1.0,
+                        help='factor to resize videos by, e.g. 0.5')
     args = parser.parse_args()
 
     run(args.mode,
@@ -238,4 +282,6 @@ if __name__ == "__main__":
         args.sigma,
         args.hidden_sizes,
         snn_input_method="all_dist",
-        scale_snn_inputs=False)
+        scale_snn_inputs=False,
+        frame_skip=args.frame_skip,
+        video_scale=args.video_scale)
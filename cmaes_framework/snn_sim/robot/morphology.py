@@ -21,18 +21,24 @@ class Morphology:
     Our own internal representation of an evogym robot.
     """
 
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, robot: WorldObject = None):
         """
         Given an evogym robot file, constructs a robot morphology.
 
         Parameters:
             filename (str): Filename of the robot .json file.
+            robot (WorldObject): The robot, if it was already loaded from `filename`.
+                                 The file is then not read again.
         """
 
         self.robot_filepath = os.path.join(
             os.path.dirname(os.path.realpath(__file__)), "world_data",
             filename)
-        self.get_config()
+        if robot is None:
+            self.get_config()
+        else:
+            self.structure = robot.get_structure()
+            self.connections = robot.get_connections()
         self.actuators = self.create_actuator_voxels(self.structure)
 
     def get_config(self):
@@ -148,33 +154,47 @@ class Morphology:
         self.top_left_corner_index = 0
         self.bottom_right_corner_index = len(self.point_masses) - 1
 
+        # Point mass indices of every actuator, one [top_left, top_right, bottom_left,
+        # bottom_right] row each, and of the robot's corners, so positions of all
+        # actuators can be gathered at once
+        self.actuator_pmis = np.array([actuator.pmis for actuator in actuators],
+                                      dtype=np.intp).reshape(-1, 4)
+        self.corner_indices = np.array(
+            [self.top_left_corner_index, self.bottom_right_corner_index],
+            dtype=np.intp)
+
         return actuators
 
-    def get_corner_distances(self, pm_pos: list) -> list:
+    def get_corner_distances(self, pm_pos: np.ndarray) -> np.ndarray:
         """
-        Given the list of robot point mass coordinates generated from sim.object_pos_at_time(),
-        returns an list of lists where each top level list corresponds to a an actuator voxel,
-        the the sublist contains the distance to the [top left corner, bottom right corner].
+        Given the robot point mass coordinates generated from sim.object_pos_at_time(),
+        returns an array where each row corresponds to an actuator voxel and holds the
+        distances from its center of mass to the [top left corner, bottom right corner].
         
         Parameters:
-            pm_pos (list): A list with the first element being a np.ndarray containing all
-                           point mass x positions, and second element containig all point mass
-                           y positions.
+            pm_pos (ndarray): Array with the first row containing all point mass x
+                              positions, and the second row containig all point mass
+                              y positions.
         
         Returns:
-            list: A list of tuples of the distances to the top left point mass and bottom right point 
-            mass of each actuator.
+            ndarray: Contiguous float array shaped (num_actuators, 2) of the distances to
+                     the top left point mass and bottom right point mass of each actuator.
         """
 
-        actuator_distances = []
+        pm_pos = np.asarray(pm_pos, dtype=float)
+
+        # (2, num_actuators, 4) coordinates of every actuator's point masses, summed
+        # one point mass at a time like Actuator.get_center_of_mass()
+        voxel_pos = pm_pos[:, self.actuator_pmis]
+        centers = (voxel_pos[..., 0] + voxel_pos[..., 1] + voxel_pos[..., 2] +
+                   voxel_pos[..., 3]) / 4
 
-        for actuator in self.actuators:
-            actuator_distances.append(
-                actuator.get_distances_to_corners(
-                    pm_pos, self.top_left_corner_index,
-                    self.bottom_right_corner_index))
+        # (num_actuators, 2) offsets from each center to each corner
+        corner_pos = pm_pos[:, self.corner_indices]
+        x_offsets = centers[0][:, None] - corner_pos[0]
+        y_offsets = centers[1][:, None] - corner_pos[1]
 
-        return actuator_distances
+        return np.hypot(x_offsets, y_offsets)
 
     def get_actuator_distances(self, pm_pos: list) -> list:
         """
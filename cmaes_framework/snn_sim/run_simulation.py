@@ -8,8 +8,7 @@ January 29th, 2025
 
 import os
 import sys
-from pathlib import Path
-import cv2
+from functools import lru_cache
 import numpy as np
 from evogym import EvoWorld, EvoSim, EvoViewer
 from evogym import WorldObject
@@ -18,8 +17,12 @@ sys.path.append(
     os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 import snn.snn_controller as snn_control
-from snn.model_struct import SPIKE_DECAY_DEFAULT
+from snn.genome_layout import GenomeLayout, snn_input_size
+from snn.model_struct import SPIKE_DECAY_DEFAULT, RECORD_FULL, RECORD_OFF
+from snn.snn_log import LOG_FILE_SUFFIX
+from snn.spike_stats import SpikeStats
 from snn_sim.robot.morphology import Morphology
+from snn_sim.video_stream import VideoStream
 
 # Simulation constants
 ROBOT_SPAWN_X = 2
@@ -28,6 +31,8 @@ ACTUATOR_MIN_LEN = 0.6
 ACTUATOR_MAX_LEN = 1.6
 FPS = 50
 MODE = "v"  # "headless", "screen", or "video"
+RENDER_MODES = ("s", "v", "b")  # Modes that need a viewer, "h" never renders
+VIEWER_RESOLUTION = (1200, 600)  # EvoViewer's default width and height
 
 SNN_INPUT_METHOD_DEFAULT = "corners"
 DEFAULT_SCALE_SNN_INPUTS = True
@@ -40,25 +45,33 @@ ROBOT_FILENAME = "bestbot.json"
 THIS_DIR = os.path.dirname(os.path.realpath(__file__))
 
 
-def create_video(source, output_name, vid_path, fps=FPS):
+def create_video(source,
+                 output_name,
+                 vid_path,
+                 fps=FPS,
+                 frame_skip=1,
+                 scale=1.0):
     """
     Saves a video from a list of frames
 
     Parameters:
-        source (list): List of cv2 frames.
+        source (iterable): RGB frames, e.g. a list of cv2 frames.
         output_name (string): Filename of output video.
         vid_path (string): Filepath of output video.
-        fps (int): Frames per second of video to save.
+        fps (int): Frames per second of the source frames.
+        frame_skip (int): Only keep every frame_skip-th frame. The video is saved at
+                          fps / frame_skip, so it plays at the same speed.
+        scale (float): Factor to resize frames by, e.g. 0.5 for half the width and
+                       height.
     """
+    if frame_skip < 1:
+        raise ValueError("frame_skip must be at least 1.")
 
-    Path(vid_path).mkdir(parents=True, exist_ok=True)
-    out = cv2.VideoWriter(os.path.join(vid_path, output_name + ".mp4"),
-                          cv2.VideoWriter_fourcc(*'mp4v'), fps,
-                          (source[0].shape[1], source[0].shape[0]))
-    for frame in source:
-        frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        out.write(frame_bgr)
-    out.release()
+    video = VideoStream(output_name, vid_path, fps / frame_skip, scale)
+    for i, frame in enumerate(source):
+        if i % frame_skip == 0:
+            video.write(frame)
+    video.close()
 
 
 def group_list(flat_list: list, n: int) -> list:
@@ -75,6 +88,177 @@ def group_list(flat_list: list, n: int) -> list:
     return [list(flat_list[i:i + n]) for i in range(0, len(flat_list), n)]
 
 
+class EvaluationContext:
+    """
+    Everything an evaluation needs from the environment and robot files: the world
+    with the robot placed in it, the robot's structure and connections, its
+    Morphology and the genome layout of its SNNs. Each file is read and parsed
+    once, when the context is built.
+    """
+
+    def __init__(self,
+                 hidden_sizes,
+                 robot_config=ROBOT_FILENAME,
+                 snn_input_method=SNN_INPUT_METHOD_DEFAULT,
+                 env_filename=ENV_FILENAME):
+        """
+        Loads and validates the environment and the robot.
+
+        Parameters:
+            hidden_sizes (list): List of numbers of nodes in hidden layers.
+            robot_config (str): Filename of the robot .json file.
+            snn_input_method (str): How SNN inputs are computed.
+                              Options are ["corners", "all_dist"]
+            env_filename (str): Filename of the environment .json file.
+        """
+        world_data = os.path.join(THIS_DIR, 'robot', 'world_data')
+        self.robot_config = robot_config
+        self.snn_input_method = snn_input_method
+        self.robot_path = os.path.join(world_data, robot_config)
+        self.env_path = os.path.join(world_data, env_filename)
+
+        for path in (self.robot_path, self.env_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"World data file not found: {path}")
+
+        robot = WorldObject.from_json(self.robot_path)
+        self.structure = robot.get_structure()
+        self.connections = robot.get_connections()
+
+        # Only read by EvoSim, so every simulation can be built from it
+        self.world = EvoWorld.from_json(self.env_path)
+        self.world.add_from_array(name='robot',
+                                  structure=self.structure,
+                                  x=ROBOT_SPAWN_X + 1,
+                                  y=ROBOT_SPAWN_Y + 1,
+                                  connections=self.connections)
+
+        self.morphology = Morphology(robot_config, robot)
+
+        num_snn = len(self.morphology.actuators)
+        if num_snn == 0:
+            raise ValueError(f"Robot {robot_config} has no actuators.")
+        inp_size = snn_input_size(snn_input_method, num_snn)
+        if inp_size == 0:
+            raise ValueError(
+                f"SNN input method {snn_input_method} gives no inputs for "
+                f"robot {robot_config}.")
+        self.layout = GenomeLayout(num_snn, inp_size, hidden_sizes)
+
+
+@lru_cache(maxsize=None)
+def _cached_evaluation_context(hidden_sizes, robot_config, snn_input_method,
+                               env_filename):
+    """Memoized body of `get_evaluation_context()`, with hashable arguments."""
+    return EvaluationContext(hidden_sizes, robot_config, snn_input_method,
+                             env_filename)
+
+
+def get_evaluation_context(hidden_sizes,
+                           robot_config=ROBOT_FILENAME,
+                           snn_input_method=SNN_INPUT_METHOD_DEFAULT,
+                           env_filename=ENV_FILENAME):
+    """
+    Returns the evaluation context for a robot, SNN input method and hidden layer
+    sizes. It is only built the first time it is asked for in a process, every
+    later evaluation reuses it.
+
+    Parameters:
+        hidden_sizes (list): List of numbers of nodes in hidden layers.
+        robot_config (str): Filename of the robot .json file.
+        snn_input_method (str): How SNN inputs are computed.
+                          Options are ["corners", "all_dist"]
+        env_filename (str): Filename of the environment .json file.
+
+    Returns:
+        EvaluationContext: The context, shared with every other caller asking for it.
+    """
+    return _cached_evaluation_context(
+        tuple(int(size) for size in hidden_sizes), robot_config,
+        snn_input_method, env_filename)
+
+
+class SimPool:
+    """
+    Keeps one prepared EvoSim per environment and robot, and resets it to its initial
+    state for every evaluation instead of building a new one.
+    """
+
+    def __init__(self):
+        """Initializes an empty SimPool."""
+        self.sims = {}
+
+    def get(self, context):
+        """
+        Returns the simulation of a context's world, reset to time 0.
+
+        Parameters:
+            context (EvaluationContext): The parsed environment and robot.
+
+        Returns:
+            EvoSim: The simulation, built the first time it is asked for.
+        """
+        key = (context.env_path, context.robot_path)
+        sim = self.sims.get(key)
+        if sim is None:
+            sim = EvoSim(context.world)
+            self.sims[key] = sim
+        sim.reset()
+        return sim
+
+    def clear(self):
+        """Forgets every kept simulation."""
+        self.sims = {}
+
+
+# Simulations reused by every evaluation in this process
+SIM_POOL = SimPool()
+
+
+def build_controller(hidden_sizes,
+                     robot_config=ROBOT_FILENAME,
+                     snn_input_method=SNN_INPUT_METHOD_DEFAULT,
+                     spike_decay=SPIKE_DECAY_DEFAULT,
+                     record=RECORD_OFF,
+                     max_steps=None,
+                     snn_dtype=np.float64,
+                     event_driven=False):
+    """
+    Builds the SNN controller for a robot. The controller can be passed to `run()` to
+    evaluate any number of genomes without being rebuilt.
+
+    Parameters:
+        hidden_sizes (list): List of numbers of nodes in hidden layers.
+        robot_config (str): Filename of the robot .json file.
+        snn_input_method (str): How SNN inputs are computed.
+                          Options are ["corners", "all_dist"]
+        spike_decay (float): Spike decay rate for neurons.
+        record (str): What the SNNs record on each step, "off", "summary" or "full".
+        max_steps (int): Expected rollout length, used to preallocate full logs.
+        snn_dtype: Float type the SNNs compute in, np.float64 or np.float32.
+        event_driven (bool): Whether layers fed by hidden layers only accumulate the
+                             weights of inputs that spiked.
+
+    Returns:
+        SNNController: The controller, without a genome loaded.
+    """
+
+    context = get_evaluation_context(hidden_sizes, robot_config,
+                                     snn_input_method)
+    layout = context.layout
+
+    return snn_control.SNNController(layout.inp_size,
+                                     hidden_sizes,
+                                     1,
+                                     robot_config=context.robot_path,
+                                     spike_decay=spike_decay,
+                                     record=record,
+                                     max_steps=max_steps,
+                                     dtype=snn_dtype,
+                                     event_driven=event_driven,
+                                     layout=layout)
+
+
 def run(iters,
         genome,
         mode,
@@ -86,7 +270,16 @@ def run(iters,
         spike_decay=SPIKE_DECAY_DEFAULT,
         robot_config=ROBOT_FILENAME,
         snn_input_method=SNN_INPUT_METHOD_DEFAULT,
-        scale_snn_inputs=DEFAULT_SCALE_SNN_INPUTS):
+        scale_snn_inputs=DEFAULT_SCALE_SNN_INPUTS,
+        probe=None,
+        snn_dtype=np.float64,
+        snn_controller=None,
+        stream_logs=False,
+        spike_stats=False,
+        context=None,
+        reuse_sim=True,
+        frame_skip=1,
+        video_scale=1.0):
     """
     Runs a single simulation of a given genome.
 
@@ -101,121 +294,235 @@ def run(iters,
         vid_name (string): If mode is "v" or "b", this is the name of the saved video.
         vid_path (string): If mode is "v" or "b", this is the path the video will be saved.
         snn_logs (bool): Whether to produce SNN logs.
+        log_filename (str): Name of the SNN log file. Logs are written in the binary
+                            format of `snn.snn_log` if it ends in ".snnlog", and
+                            as CSV otherwise.
         snn_input_method (str): How SNN inputs are computed. 
                           Options are ["corners", "neighbors"]
         scale_inputs (bool): Whether or not to scale SNN inputs.
+        probe (snn.probes.Probe): If given, SNN logs only hold the neurons, signals and
+                                  steps this probe records.
+        snn_dtype: Float type the SNNs compute in, np.float64 or np.float32.
+        snn_controller (SNNController): A controller from `build_controller()` to reuse
+                                        instead of building a new one. It must have
+                                        been built with the same `spike_decay` and
+                                        `snn_dtype`, and record full logs if
+                                        `snn_logs` are kept without a probe or
+                                        stream.
+        stream_logs (bool): Write SNN logs to disk in chunks during the simulation
+                            instead of keeping them in memory until the end. Needs a
+                            `log_filename` ending in ".snnlog" and no probe.
+        spike_stats (bool): Also return summary statistics of the SNNs' activity,
+                            see `snn.spike_stats.SpikeStats.summary()`.
+        context (EvaluationContext): The parsed environment and robot, used instead of
+                                     `robot_config` and `snn_input_method`. By
+                                     default the one from `get_evaluation_context()`.
+        reuse_sim (bool): Reset this process's simulation of the world from
+                          `SIM_POOL` instead of building a new one. See
+                          `check_sim_reuse()`.
+        frame_skip (int): In modes "s", "v" and "b", only render every
+                          frame_skip-th step. Videos are saved at FPS / frame_skip,
+                          so they play at the same speed.
+        video_scale (float): Factor to resize video frames by, e.g. 0.5 for half the
+                             width and height. In mode "v" the viewer renders at that
+                             resolution to begin with.
     Returns:
         float: The fitness of the genome.
+        dict: If `spike_stats`, the statistics of each SNN layer, returned as a
+              (fitness, statistics) tuple.
     """
 
-    # Create world
-    world = EvoWorld.from_json(
-        os.path.join(THIS_DIR, 'robot', 'world_data', ENV_FILENAME))
-
-    robot = WorldObject.from_json(
-        os.path.join(THIS_DIR, 'robot', 'world_data', robot_config))
-
-    world.add_from_array(name='robot',
-                         structure=robot.get_structure(),
-                         x=ROBOT_SPAWN_X + 1,
-                         y=ROBOT_SPAWN_Y + 1,
-                         connections=robot.get_connections())
-
-    # Create simulation
-    sim = EvoSim(world)
-    sim.reset()
-
-    # Set up viewer
-    viewer = EvoViewer(sim)
-    viewer.track_objects('robot')
-
-    video_frames = []
+    if snn_logs and stream_logs:
+        if probe is not None or not log_filename.endswith(LOG_FILE_SUFFIX):
+            raise ValueError(
+                "Streamed SNN logs need a .snnlog log_filename and no probe.")
+
+    if frame_skip < 1:
+        raise ValueError("frame_skip must be at least 1.")
+
+    if snn_controller is not None:
+        if (snn_logs and probe is None and not stream_logs
+                and snn_controller.record != RECORD_FULL):
+            raise ValueError(
+                "SNN logs without a probe or stream need a controller that "
+                "records full logs.")
+        if spike_decay != snn_controller.spike_decay:
+            raise ValueError(
+                f"spike_decay {spike_decay} doesn't match the controller's "
+                f"{snn_controller.spike_decay}.")
+        if np.dtype(snn_dtype) != snn_controller.dtype:
+            raise ValueError(
+                f"snn_dtype {np.dtype(snn_dtype)} doesn't match the controller's "
+                f"{snn_controller.dtype}.")
+
+    if context is None:
+        context = get_evaluation_context(hidden_sizes, robot_config,
+                                         snn_input_method)
+    robot_config = context.robot_config
+    snn_input_method = context.snn_input_method
+
+    # Create simulation from the world parsed once per process
+    if reuse_sim:
+        sim = SIM_POOL.get(context)
+    else:
+        sim = EvoSim(context.world)
+        sim.reset()
+
+    # Everything opened for this rollout is closed again if it fails part way
+    viewer = None
+    video = None
+    stats = None
+    log_stream = None
+    try:
+        # Set up viewer, headless runs never touch rendering state
+        frame_scale = video_scale
+        if mode in RENDER_MODES:
+            resolution = VIEWER_RESOLUTION
+            if mode == "v":
+                # Nothing is shown on screen, so render small instead of resizing
+                resolution = tuple(
+                    max(1, round(size * video_scale)) for size in resolution)
+                frame_scale = 1.0
+            viewer = EvoViewer(sim, resolution=resolution)
+            viewer.track_objects('robot')
+
+        # Frames are encoded as they are rendered instead of being kept until the end
+        if mode in ["v", "b"]:
+            video = VideoStream(vid_name, vid_path, FPS / frame_skip, frame_scale)
+
+        # Get position of all robot point masses
+        init_raw_pm_pos = sim.object_pos_at_time(sim.get_time(), "robot")
+
+        morphology = context.morphology
+
+        if snn_controller is None:
+            # Probes and log streams record what they need themselves
+            keep_logs = snn_logs and probe is None and not stream_logs
+            snn_controller = build_controller(
+                hidden_sizes,
+                robot_config,
+                snn_input_method,
+                spike_decay,
+                record=RECORD_FULL if keep_logs else RECORD_OFF,
+                max_steps=iters,
+                snn_dtype=snn_dtype)
+
+        snn_controller.load_genome(genome)
+
+        if probe is not None and probe not in snn_controller.probes:
+            snn_controller.add_probe(probe)
+
+        if spike_stats:
+            stats = SpikeStats()
+            snn_controller.add_probe(stats)
+
+        if snn_logs and stream_logs:
+            log_stream = snn_controller.stream_output_log(log_filename, iters)
+
+        def scale_inputs(init, cur):
+            init = np.asarray(init, dtype=float)
+            cur = np.asarray(cur, dtype=float)
+
+            # Compute relative change
+            scaled = ((cur - init) / init) * 10 + 1
+
+            # print("Scaled: ", scaled)
+
+            # Clip so that min is -1 and max is 0
+            return scaled
+
+        for i in range(iters):
+            # Get point mass locations
+            raw_pm_pos = sim.object_pos_at_time(sim.get_time(), "robot")
+
+            # Decide what our inputs to the SNN are going to be
+
+            if snn_input_method == "corners":
+                inputs = morphology.get_corner_distances(raw_pm_pos)
+            elif snn_input_method == "all_dist":
+                inputs = np.array(morphology.get_actuator_distances(raw_pm_pos))
+
+            if i == 0:
+                init = inputs
+
+            if scale_snn_inputs:
+                inputs = scale_inputs(init, inputs)
+
+            # Get action from SNN controller
+            action = snn_controller.get_lengths(inputs)
+
+            # Clip actuator target lengths to be between 0.6 and 1.6 to prevent buggy behavior
+            action = np.clip(action, ACTUATOR_MIN_LEN, ACTUATOR_MAX_LEN)
+
+            # Set robot action to the action vector. Each actuator corresponds to a vector
+            # index and will try to expand/contract to that value
+            sim.set_action('robot', action)
+
+            # Execute step
+            sim.step()
+
+            # Steps that aren't recorded aren't rendered either
+            if viewer is None or i % frame_skip:
+                continue
+
+            if mode == "v":
+                video.write(viewer.render(verbose=False, mode="rgb_array"))
+            elif mode == "s":
+                viewer.render(verbose=True, mode="screen")
+            elif mode == "b":
+                viewer.render(verbose=True, mode="screen")
+                video.write(viewer.render(verbose=False, mode="rgb_array"))
+
+        # Get robot point mass position position afer sim has run
+        final_raw_pm_pos = sim.object_pos_at_time(sim.get_time(), "robot")
+
+        fitness = np.mean(final_raw_pm_pos[0]) - np.mean(init_raw_pm_pos[0])
+
+        if snn_logs and log_stream is None:
+            if log_filename.endswith(LOG_FILE_SUFFIX):
+                snn_controller.generate_output_log(log_filename, probe)
+            else:
+                snn_controller.generate_output_csv(log_filename, probe)
 
-    # Get position of all robot point masses
-    init_raw_pm_pos = sim.object_pos_at_time(sim.get_time(), "robot")
+        if stats is not None:
+            # Detaching forgets the layers, so summarize first
+            summary = stats.summary()
+    finally:
+        if viewer is not None:
+            viewer.close()
+        if video is not None:
+            video.close()
+        if log_stream is not None:
+            log_stream.close()
+        if stats is not None:
+            snn_controller.remove_probe(stats)
+
+    if stats is not None:
+        return FITNESS_OFFSET - fitness, summary
 
-    morphology = Morphology(robot_config)
-
-    robot_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                   'robot', 'world_data', robot_config)
-
-    NUM_ACTUATORS, SNN_INPUT_SHAPE = snn_control.compute_genome_size(
-        robot_file_path, snn_input_method, hidden_sizes)
-
-    if snn_input_method == "corners":
-        snn_input_size = 2
-    elif snn_input_method == "all_dist":
-        snn_input_size = NUM_ACTUATORS - 1
-
-    snn_controller = snn_control.SNNController(snn_input_size,
-                                               hidden_sizes,
-                                               1,
-                                               robot_config=robot_file_path,
-                                               spike_decay=spike_decay)
-
-    snn_controller.set_snn_weights(genome)
-
-    def scale_inputs(init, cur):
-        init = np.asarray(init, dtype=float)
-        cur = np.asarray(cur, dtype=float)
-
-        # Compute relative change
-        scaled = ((cur - init) / init) * 10 + 1
-
-        # print("Scaled: ", scaled)
-
-        # Clip so that min is -1 and max is 0
-        return scaled
-
-    for i in range(iters):
-        # Get point mass locations
-        raw_pm_pos = sim.object_pos_at_time(sim.get_time(), "robot")
-
-        # Decide what our inputs to the SNN are going to be
-
-        if snn_input_method == "corners":
-            inputs = np.array(morphology.get_corner_distances(raw_pm_pos))
-        elif snn_input_method == "all_dist":
-            inputs = np.array(morphology.get_actuator_distances(raw_pm_pos))
-
-        if i == 0:
-            init = inputs
-
-        if scale_snn_inputs:
-            inputs = scale_inputs(init, inputs)
-
-        # Get action from SNN controller
-        action = snn_controller.get_lengths(inputs)
-
-        # Clip actuator target lengths to be between 0.6 and 1.6 to prevent buggy behavior
-        action = np.clip(action, ACTUATOR_MIN_LEN, ACTUATOR_MAX_LEN)
-
-        # Set robot action to the action vector. Each actuator corresponds to a vector
-        # index and will try to expand/contract to that value
-        sim.set_action('robot', action)
-
-        # Execute step
-        sim.step()
-
-        if mode == "v":
-            video_frames.append(viewer.render(verbose=False, mode="rgb_array"))
-        elif mode == "s":
-            viewer.render(verbose=True, mode="screen")
-        elif mode == "b":
-            viewer.render(verbose=True, mode="screen")
-            video_frames.append(viewer.render(verbose=False, mode="rgb_array"))
-
-    viewer.close()
-
-    # Get robot point mass position position afer sim has run
-    final_raw_pm_pos = sim.object_pos_at_time(sim.get_time(), "robot")
+    return FITNESS_OFFSET - fitness  # Turn into a minimization problem
 
-    fitness = np.mean(final_raw_pm_pos[0]) - np.mean(init_raw_pm_pos[0])
 
-    if mode in ["v", "b"]:
-        create_video(video_frames, vid_name, vid_path, FPS)
+def check_sim_reuse(iters, genome, hidden_sizes, **run_kwargs):
+    """
+    Checks that a genome gets exactly the same fitness on a reused simulation as on
+    a freshly built one. The reused simulation is run twice, so the second run starts
+    from the reset of a used simulation.
 
-    if snn_logs:
-        snn_controller.generate_output_csv(log_filename)
+    Parameters:
+        iters (int): How many iterations to run.
+        genome (ndarray): The genome of the robot.
+        hidden_sizes (list): List of numbers of nodes in hidden layers.
+        run_kwargs: Other keyword arguments of `run()`, e.g. `context`.
 
-    return FITNESS_OFFSET - fitness  # Turn into a minimization problem
+    Returns:
+        bool: True if all three fitnesses are equal.
+    """
+    run_kwargs["mode"] = "h"
+    fresh = run(iters, genome, hidden_sizes=hidden_sizes, reuse_sim=False,
+                **run_kwargs)
+    first = run(iters, genome, hidden_sizes=hidden_sizes, reuse_sim=True,
+                **run_kwargs)
+    reused = run(iters, genome, hidden_sizes=hidden_sizes, reuse_sim=True,
+                 **run_kwargs)
+    return fresh == first == reused
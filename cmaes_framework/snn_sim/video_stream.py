@@ -0,0 +1,107 @@
+"""
+Encodes simulation videos while the simulation runs. Frames are handed to a
+background thread through a bounded queue, so only a few frames are ever held in
+memory instead of the whole video.
+
+October 18th, 2026
+"""
+
+import os
+import queue
+import threading
+from pathlib import Path
+import cv2
+
+DEFAULT_QUEUE_FRAMES = 8  # Frames waiting to be encoded before `write()` blocks
+
+
+class VideoStream:
+    """
+    Writes RGB frames to an mp4 video from a background thread.
+    """
+
+    def __init__(self,
+                 output_name,
+                 vid_path,
+                 fps,
+                 scale=1.0,
+                 queue_frames=DEFAULT_QUEUE_FRAMES):
+        """
+        Initializes a VideoStream and starts its encoder thread.
+
+        Parameters:
+            output_name (string): Filename of output video, without extension.
+            vid_path (string): Filepath of output video.
+            fps (float): Frames per second of video to save.
+            scale (float): Factor to resize frames by, e.g. 0.5 for half the width
+                           and height. Frames are resized on the encoder thread.
+            queue_frames (int): How many frames can wait to be encoded. Writing
+                                blocks when the queue is full.
+        """
+        if queue_frames < 1:
+            raise ValueError("Video streams need room for at least one frame.")
+        if scale <= 0:
+            raise ValueError("Video frames need a positive scale.")
+
+        Path(vid_path).mkdir(parents=True, exist_ok=True)
+        self.path = os.path.join(vid_path, output_name + ".mp4")
+        self.fps = fps
+        self.scale = scale
+        self.frames = 0  # Number of frames written
+
+        self._out = None  # Opened on the first frame, when its size is known
+        self._error = None
+        self._queue = queue.Queue(maxsize=queue_frames)
+        self._encoder = threading.Thread(target=self._encode, daemon=True)
+        self._encoder.start()
+
+    def write(self, frame):
+        """
+        Hands a frame to the encoder thread.
+
+        Parameters:
+            frame (ndarray): RGB frame shaped (height, width, 3), e.g. from
+                             `viewer.render(mode="rgb_array")`. It must not be
+                             modified afterwards.
+        """
+        if self._encoder is None:
+            raise ValueError("Video stream is closed.")
+        if self._error is not None:
+            raise self._error
+        self._queue.put(frame)
+        self.frames += 1
+
+    def _encode(self):
+        """Encodes queued frames, run by the encoder thread."""
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                break
+            try:
+                if self._error is None:
+                    if self.scale != 1.0:
+                        size = (max(1, round(frame.shape[1] * self.scale)),
+                                max(1, round(frame.shape[0] * self.scale)))
+                        frame = cv2.resize(frame,
+                                           size,
+                                           interpolation=cv2.INTER_AREA)
+                    if self._out is None:
+                        self._out = cv2.VideoWriter(
+                            self.path, cv2.VideoWriter_fourcc(*'mp4v'),
+                            self.fps, (frame.shape[1], frame.shape[0]))
+                    self._out.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+            except Exception as error:  # Raised again on the simulation thread
+                self._error = error
+
+        if self._out is not None:
+            self._out.release()
+
+    def close(self):
+        """Encodes the remaining frames, finishes the video file and stops the thread."""
+        if self._encoder is None:
+            return
+        self._queue.put(None)
+        self._encoder.join()
+        self._encoder = None
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,139 @@
+"""
+Module describing how a flat CMA-ES genome maps onto the SNNs of a robot.
+
+The genome holds one parameter vector per actuator SNN, back to back. Each of those
+holds every layer's weights back to back, and each layer holds one row per neuron:
+the neuron's input weights followed by its bias.
+"""
+
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+SNN_INPUT_METHODS = ("corners", "all_dist")
+
+# Where one layer's parameters sit inside a single SNN's parameter vector
+LayerLayout = namedtuple(
+    "LayerLayout",
+    ["name", "start", "end", "num_nodes", "num_inputs", "bias_positions"])
+
+
+def count_actuators(robot_path):
+    """
+    Counts the actuator voxels (types 3 and 4) of a robot.
+
+    Parameters:
+        robot_path (str): Path to robot JSON configuration file.
+
+    Returns:
+        int: Number of actuators, which is also the number of SNNs.
+    """
+    if not os.path.exists(robot_path):
+        raise FileNotFoundError(
+            f"Robot configuration file not found: {robot_path}")
+    with open(robot_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    # Extract robot data
+    robot_key = list(data["objects"].keys())[0]
+    robot_data = data["objects"][robot_key]
+
+    return sum(1 for t in robot_data["types"] if t in [3, 4])
+
+
+def snn_input_size(snn_input_method, num_snn):
+    """
+    Returns how many inputs each SNN takes.
+
+    Parameters:
+        snn_input_method (str): How SNN inputs are computed, one of `SNN_INPUT_METHODS`.
+        num_snn (int): Number of actuator SNNs.
+
+    Returns:
+        int: Number of inputs into each SNN.
+    """
+    if snn_input_method == "corners":
+        return 2  # Inputs are distances to two corners
+    if snn_input_method == "all_dist":
+        return num_snn - 1  # Inputs are distances to all other actuators
+    raise ValueError(f"Unknown SNN input method {snn_input_method}, "
+                     f"expected one of {SNN_INPUT_METHODS}")
+
+
+class GenomeLayout:
+    """
+    Precomputed offsets, shapes and bias positions of every layer of every SNN in a
+    genome. Only holds ints and tuples, so it is cheap to pickle to worker processes.
+    """
+
+    def __init__(self, num_snn, inp_size, hidden_sizes, output_size=1):
+        """
+        Initializes a GenomeLayout.
+
+        Parameters:
+            num_snn (int): Number of actuator SNNs.
+            inp_size (int): Number of inputs for each SNN.
+            hidden_sizes (list): List of numbers of nodes in hidden layers.
+            output_size (int): Number of outputs of each SNN.
+        """
+        self.num_snn = num_snn
+        self.inp_size = inp_size
+        self.hidden_sizes = tuple(int(size) for size in hidden_sizes)
+        self.output_size = output_size
+
+        layers = []
+        start = 0
+        layer_input_size = inp_size
+        sizes = [(f"hidden{j}", size)
+                 for j, size in enumerate(self.hidden_sizes)]
+        sizes.append(("output", output_size))
+
+        for name, num_nodes in sizes:
+            end = start + (layer_input_size + 1) * num_nodes
+            bias_positions = tuple(
+                range(start + layer_input_size, end, layer_input_size + 1))
+            layers.append(
+                LayerLayout(name, start, end, num_nodes, layer_input_size,
+                            bias_positions))
+            start = end
+            layer_input_size = num_nodes
+
+        self.layers = tuple(layers)
+        self.params_per_snn = start
+        self.genome_length = num_snn * self.params_per_snn
+
+    def __eq__(self, other):
+        return isinstance(other, GenomeLayout) and (
+            self.num_snn, self.inp_size, self.hidden_sizes,
+            self.output_size) == (other.num_snn, other.inp_size,
+                                  other.hidden_sizes, other.output_size)
+
+    def __hash__(self):
+        return hash((self.num_snn, self.inp_size, self.hidden_sizes,
+                     self.output_size))
+
+
+@lru_cache(maxsize=None)
+def _cached_genome_layout(robot_path, snn_input_method, hidden_sizes):
+    """Memoized body of `get_genome_layout()`, with hashable arguments."""
+    num_snn = count_actuators(robot_path)
+    return GenomeLayout(num_snn, snn_input_size(snn_input_method, num_snn),
+                        hidden_sizes)
+
+
+def get_genome_layout(robot_path, snn_input_method, hidden_sizes):
+    """
+    Returns the genome layout for a robot, SNN input method and hidden layer sizes.
+    The robot file is only read the first time a layout is asked for in a process.
+
+    Parameters:
+        robot_path (str): Path to robot JSON configuration file.
+        snn_input_method (str): How SNN inputs are computed, one of `SNN_INPUT_METHODS`.
+        hidden_sizes (list): A list of the sizes of all the hidden layers.
+
+    Returns:
+        GenomeLayout: The layout, shared with every other caller asking for it.
+    """
+    return _cached_genome_layout(os.path.abspath(robot_path), snn_input_method,
+                                 tuple(int(size) for size in hidden_sizes))
@@ -0,0 +1,197 @@
+"""
+Module for random access into CSV SNN logs. A sidecar offset table next to the CSV
+file records where each row starts, so one neuron's logs can be read without
+parsing the rest of the file.
+"""
+
+from functools import lru_cache
+import json
+import os
+import numpy as np
+from snn.snn_log import LOG_NAMES, DEFAULT_CACHE_SIZE
+
+INDEX_SUFFIX = ".index.json"
+INDEX_VERSION = 1
+
+
+def build_csv_index(csv_path):
+    """
+    Scans a CSV SNN log once and writes its offset table next to it.
+
+    Parameters:
+        csv_path (str): Path to a CSV log from `SNNController.generate_output_csv()`.
+
+    Returns:
+        dict: The offset table, as written to `csv_path + INDEX_SUFFIX`.
+    """
+    rows = []
+    with open(csv_path, "rb") as csv_file:
+        header = csv_file.readline()
+        offset = len(header)
+        for line in csv_file:
+            snn_id, layer, neuron, log_name, _ = (line.split(b",", 4) + [b""])[:5]
+            rows.append([
+                snn_id.decode(),
+                layer.decode(),
+                neuron.decode(),
+                log_name.decode().strip(), offset,
+                len(line)
+            ])
+            offset += len(line)
+
+    stat = os.stat(csv_path)
+    index = {
+        "version": INDEX_VERSION,
+        "csv_size": stat.st_size,
+        "csv_mtime_ns": stat.st_mtime_ns,
+        "columns": header.decode().strip().split(","),
+        "rows": rows
+    }
+    with open(csv_path + INDEX_SUFFIX, "w") as index_file:
+        json.dump(index, index_file)
+    return index
+
+
+def load_csv_index(csv_path):
+    """
+    Loads the offset table of a CSV SNN log, building it if it is missing or the
+    CSV file changed since it was built.
+
+    Parameters:
+        csv_path (str): Path to a CSV log.
+
+    Returns:
+        dict: The offset table, see `build_csv_index()`.
+    """
+    index_path = csv_path + INDEX_SUFFIX
+    if os.path.exists(index_path):
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+        stat = os.stat(csv_path)
+        if (index.get("version") == INDEX_VERSION and
+                index["csv_size"] == stat.st_size and
+                index["csv_mtime_ns"] == stat.st_mtime_ns):
+            return index
+    return build_csv_index(csv_path)
+
+
+class CSVLog:
+    """
+    Reads single neurons out of a CSV SNN log through its offset table. Offers the
+    same reading methods as `snn.snn_log.SNNLog`.
+    """
+
+    def __init__(self, csv_path, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Opens a CSV SNN log.
+
+        Parameters:
+            csv_path (str): Path to a CSV log.
+            cache_size (int): How many results of `get()` to keep, so plotting the
+                              same neurons again doesn't read them again.
+        """
+        self.path = str(csv_path)
+        index = load_csv_index(self.path)
+
+        self.steps = np.array(
+            [int(column[len("step"):]) for column in index["columns"][4:]],
+            dtype=np.int64)
+
+        # (snn_id, layer, neuron, log) -> (offset, length) of the row
+        self.offsets = {}
+        neurons = {}
+        for snn_id, layer, neuron, log_name, offset, length in index["rows"]:
+            key = (int(snn_id), layer, int(neuron))
+            self.offsets[(*key, log_name)] = (offset, length)
+            neurons[key] = None
+        self._neurons = list(neurons)
+
+        logged = {log_name for *_, log_name in self.offsets}
+        self.log_names = [name for name in LOG_NAMES if name in logged]
+        self.snn_ids = sorted({snn_id for snn_id, _, _ in self._neurons})
+
+        self._cached_get = lru_cache(maxsize=cache_size)(self._get)
+
+    @property
+    def num_steps(self):
+        """Number of logged samples per neuron."""
+        return len(self.steps)
+
+    def has(self, log_name, snn_id, layer, neuron):
+        """
+        Checks whether a neuron's log is in the file.
+
+        Parameters:
+            log_name (str): Name of the log.
+            snn_id (int): ID of the SNN.
+            layer (str): Name of the layer.
+            neuron (int): Index of the neuron.
+
+        Returns:
+            bool: True if the neuron was logged.
+        """
+        return (snn_id, layer, neuron, log_name) in self.offsets
+
+    def get(self, log_name, snn_id, layer, neuron):
+        """
+        Reads one log of one neuron, only touching that row of the file.
+
+        Parameters:
+            log_name (str): One of `LOG_NAMES`.
+            snn_id (int): ID of the SNN.
+            layer (str): Name of the layer.
+            neuron (int): Index of the neuron.
+
+        Returns:
+            ndarray: Read-only float array with one value per logged step. Repeated
+                     calls return the cached array.
+        """
+        return self._cached_get(log_name, snn_id, layer, neuron)
+
+    def _get(self, log_name, snn_id, layer, neuron):
+        """
+        Reads one log of one neuron, see `get()`.
+
+        Returns:
+            ndarray: Read-only float array.
+        """
+        key = (snn_id, layer, neuron, log_name)
+        if key not in self.offsets:
+            raise KeyError(f"No {log_name} for SNN {snn_id} {layer} {neuron}")
+        offset, length = self.offsets[key]
+        with open(self.path, "rb") as csv_file:
+            csv_file.seek(offset)
+            line = csv_file.read(length)
+
+        values = np.array(line.split(b",")[4:], dtype=np.float64)
+        values.flags.writeable = False
+        return values
+
+    def spike_times(self, snn_id, layer, neuron):
+        """
+        Finds the logged samples on which a neuron fired.
+
+        Parameters:
+            snn_id (int): ID of the SNN.
+            layer (str): Name of the layer.
+            neuron (int): Index of the neuron.
+
+        Returns:
+            ndarray: Indices of the samples with a spike.
+        """
+        return np.flatnonzero(self.get("firelog", snn_id, layer, neuron) > 0)
+
+    def neurons(self, snn_id=None):
+        """
+        Lists the logged neurons.
+
+        Parameters:
+            snn_id (int): Only list the neurons of this SNN, or None for all SNNs.
+
+        Returns:
+            list: (snn_id, layer, neuron) of each logged neuron, in file order.
+        """
+        return [
+            neuron for neuron in self._neurons
+            if snn_id is None or neuron[0] == snn_id
+        ]
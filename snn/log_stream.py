@@ -0,0 +1,251 @@
+"""
+Module for streaming full SNN logs to a binary log file while the SNN runs, so that
+memory use doesn't grow with the length of a rollout.
+"""
+
+import os
+import queue
+import threading
+from pathlib import Path
+import numpy as np
+from snn.snn_log import LOG_DTYPES, PACKED_LOGS, write_snn_log_header
+from snn.spikes import packed_length, pack_spikes
+
+DEFAULT_CHUNK_STEPS = 1000  # Timesteps buffered before they are handed to the writer
+DEFAULT_NUM_CHUNKS = 2  # Chunk buffers, one filling while the others are written
+
+# Logs written by streams, duty cycles are computed from the fire log when read
+STREAM_LOG_NAMES = ("levellog", "firelog")
+
+
+class LogStream:
+    """
+    Records every neuron of an SNN, like a full NeuronLog, but only keeps a few
+    fixed-size chunks of timesteps in memory. Full chunks are written to a binary
+    SNN log file (see `snn.snn_log`) by a background thread.
+    """
+
+    def __init__(self,
+                 path,
+                 max_steps,
+                 chunk_steps=DEFAULT_CHUNK_STEPS,
+                 num_chunks=DEFAULT_NUM_CHUNKS):
+        """
+        Initializes a LogStream.
+
+        Parameters:
+            path (str): Directory of the log file to write.
+            max_steps (int): Most timesteps the rollout can have. The log file is
+                             preallocated for this many.
+            chunk_steps (int): How many timesteps to buffer before writing them, a
+                               multiple of 8 so chunks of fires pack into whole
+                               bytes.
+            num_chunks (int): How many chunk buffers to keep. Recording only waits
+                              for the writer when all of them are full.
+        """
+        if chunk_steps < 1 or num_chunks < 1:
+            raise ValueError("Log streams need at least one chunk of one step.")
+        if chunk_steps % 8:
+            raise ValueError("Log stream chunks need a multiple of 8 steps.")
+
+        self.path = str(path)
+        self.max_steps = max_steps
+        self.chunk_steps = chunk_steps
+        self.num_chunks = num_chunks
+
+        self.layer_streams = []
+        self.steps = 0  # Number of recorded timesteps
+        self.count = 0  # Number of timesteps in the chunk being filled
+        self.chunk = None
+        self._free_chunks = None
+        self._full_chunks = None
+        self._writer = None
+        self._error = None
+
+    def attach(self, net):
+        """
+        Hooks the stream into every layer of `net`, creates the log file and starts
+        the writer thread.
+
+        Parameters:
+            net (SpikyNet): A vectorized SpikyNet, either unbatched or batched over
+                            SNNs, like `SNNController.net`.
+        """
+        if not net.vectorized or len(net.batch_shape) > 1:
+            raise ValueError(
+                "Log streams need a vectorized SpikyNet with at most one batch "
+                "dimension.")
+        if self._writer is not None:
+            raise ValueError("Log stream is already attached.")
+
+        self.layer_names = net.layer_names
+        self.layer_sizes = [layer.num_nodes for layer in net.layers]
+        self.num_snn = net.batch_shape[0] if net.batch_shape else 1
+        # [snn, layer, neuron] of one timestep, padded to the biggest layer
+        self.shape = (self.num_snn, len(self.layer_sizes), max(self.layer_sizes))
+
+        Path(self.path).mkdir(parents=True, exist_ok=True)
+        self._offsets = {}
+        for log_name in STREAM_LOG_NAMES:
+            log_length = self.max_steps
+            if log_name in PACKED_LOGS:
+                log_length = packed_length(self.max_steps)
+            log = np.lib.format.open_memmap(os.path.join(self.path,
+                                                         log_name + ".npy"),
+                                            mode="w+",
+                                            dtype=LOG_DTYPES[log_name],
+                                            shape=(*self.shape, log_length))
+            self._offsets[log_name] = log.offset
+            del log
+
+        self._free_chunks = queue.Queue()
+        for _ in range(self.num_chunks):
+            self._free_chunks.put({
+                "levellog":
+                    np.zeros((*self.shape, self.chunk_steps),
+                             dtype=LOG_DTYPES["levellog"]),
+                "firelog":
+                    np.zeros((*self.shape, self.chunk_steps), dtype=bool)
+            })
+        self._full_chunks = queue.Queue()
+        self.chunk = self._free_chunks.get()
+
+        self._writer = threading.Thread(target=self._write_chunks, daemon=True)
+        self._writer.start()
+
+        for layer_index, layer in enumerate(net.layers):
+            layer_stream = LayerStream(self, layer_index,
+                                       layer_index == len(net.layers) - 1)
+            layer.probes.append(layer_stream)
+            self.layer_streams.append((layer, layer_stream))
+
+    def detach(self):
+        """Unhooks the stream from the layers it is attached to."""
+        for layer, layer_stream in self.layer_streams:
+            layer.probes.remove(layer_stream)
+        self.layer_streams = []
+
+    def next_step(self):
+        """
+        Moves on to the next timestep once every layer has recorded, handing the
+        chunk to the writer thread when it is full.
+        """
+        if self.steps == self.max_steps:
+            raise ValueError(
+                f"Log stream is full, it holds {self.max_steps} timesteps.")
+        self.steps += 1
+        self.count += 1
+        if self.count == self.chunk_steps:
+            self._flush()
+
+    def _flush(self):
+        """Hands the current chunk to the writer thread and starts a new one."""
+        if self._error is not None:
+            raise self._error
+        self._full_chunks.put((self.steps - self.count, self.count, self.chunk))
+        self.chunk = self._free_chunks.get()
+        self.count = 0
+
+    def _write_chunks(self):
+        """Writes full chunks to the log file, run by the writer thread."""
+        while True:
+            item = self._full_chunks.get()
+            if item is None:
+                return
+            start, count, chunk = item
+            try:
+                if self._error is None:
+                    for log_name, values in chunk.items():
+                        values = values[..., :count]
+                        if log_name in PACKED_LOGS:
+                            values = pack_spikes(values)
+                        self._write_chunk(log_name, values, start)
+            except Exception as error:  # Raised again on the recording thread
+                self._error = error
+            self._free_chunks.put(chunk)
+
+    def _write_chunk(self, log_name, values, start):
+        """
+        Writes the timesteps of one log in a chunk into place. The log file is indexed
+        by [snn, layer, neuron, step], so every neuron's timesteps are one
+        contiguous run of bytes.
+
+        Parameters:
+            log_name (str): One of `STREAM_LOG_NAMES`.
+            values (ndarray): Timesteps of the log shaped (*self.shape, steps),
+                              packed if the log is.
+            start (int): Timestep the chunk starts at.
+        """
+        itemsize = values.dtype.itemsize
+        row_length = self.max_steps
+        if log_name in PACKED_LOGS:
+            row_length = packed_length(self.max_steps)
+            start //= 8
+        row_bytes = row_length * itemsize
+        offset = self._offsets[log_name] + start * itemsize
+        with open(os.path.join(self.path, log_name + ".npy"), "r+b") as log_file:
+            for row, row_values in enumerate(values.reshape(-1, values.shape[-1])):
+                log_file.seek(offset + row * row_bytes)
+                log_file.write(row_values.tobytes())
+
+    def close(self):
+        """
+        Writes the remaining timesteps and the log header, then stops the writer
+        thread and detaches the stream.
+        """
+        if self._writer is None:
+            return
+        self.detach()
+        if self.count:
+            self._flush()
+        self._full_chunks.put(None)
+        self._writer.join()
+        self._writer = None
+        if self._error is not None:
+            raise self._error
+
+        recorded = np.zeros(self.shape, dtype=bool)
+        for layer_index, size in enumerate(self.layer_sizes):
+            recorded[:, layer_index, :size] = True
+        write_snn_log_header(self.path, range(self.num_snn), self.layer_names,
+                             self.layer_sizes, STREAM_LOG_NAMES,
+                             np.arange(self.steps), recorded)
+
+
+class LayerStream:
+    """
+    The part of a LogStream that records one layer.
+    """
+
+    def __init__(self, stream, layer_index, last):
+        """
+        Initializes a LayerStream.
+
+        Parameters:
+            stream (LogStream): The stream this belongs to.
+            layer_index (int): Position of the layer in the SNN.
+            last (bool): Whether this is the last layer to record on each step.
+        """
+        self.stream = stream
+        self.layer_index = layer_index
+        self.last = last
+
+    def record(self, step, levels, fired, fire_counts):
+        """
+        Records the layer's state into the stream's current chunk.
+
+        Parameters:
+            step (int): Timestep, counting from zero.
+            levels (ndarray): Activation level of every neuron in the layer.
+            fired (ndarray): Whether every neuron in the layer fired.
+            fire_counts (ndarray): Unused, duty cycles are computed from the
+                                   logged spikes when the log is read.
+        """
+        stream = self.stream
+        num_nodes = levels.shape[-1]
+        state = {"levellog": levels, "firelog": fired}
+        for log_name, values in stream.chunk.items():
+            values[:, self.layer_index, :num_nodes,
+                   stream.count] = state[log_name].reshape(-1, num_nodes)
+        if self.last:
+            stream.next_step()
@@ -6,32 +6,78 @@ Modified by: Hades Panlilio
 """
 
 import numpy as np
-from snn.ring_buffer import RingBuffer
+from snn.ring_buffer import RingBuffer, ArrayRingBuffer
+from snn.neuron_log import NeuronLog
+from snn.genome_layout import GenomeLayout
 
 # Constants
 SPIKE_DECAY_DEFAULT = 0.01
 MAX_BIAS = 1
 MAX_FIRELOG_SIZE = 10
 
+# Recording levels: nothing, per-neuron spike counts, or every timestep
+RECORD_OFF = "off"
+RECORD_SUMMARY = "summary"
+RECORD_FULL = "full"
+RECORD_LEVELS = (RECORD_OFF, RECORD_SUMMARY, RECORD_FULL)
+
+# Weight initializations: random in [-0.3, 0.3), zeros, or left uninitialized for
+# when a genome will be loaded before the weights are used
+INIT_RANDOM = "random"
+INIT_ZEROS = "zeros"
+INIT_EMPTY = "empty"
+WEIGHT_INITS = (INIT_RANDOM, INIT_ZEROS, INIT_EMPTY)
+
+
+def init_weights(shape, init=INIT_RANDOM, rng=None, dtype=np.float64):
+    """
+    Creates an array of initial weights with a single call.
+
+    Parameters:
+        shape (tuple): Shape of the weights array.
+        init (str): How to initialize the weights, one of `WEIGHT_INITS`.
+        rng (np.random.Generator): Generator for random weights. A new one is seeded
+                                   from the OS if None, the global NumPy RNG is
+                                   never used.
+        dtype: Float type of the weights.
+
+    Returns:
+        ndarray: The weights.
+    """
+    if init == INIT_RANDOM:
+        if rng is None:
+            rng = np.random.default_rng()
+        return rng.uniform(-0.3, 0.3, shape).astype(dtype, copy=False)
+    if init == INIT_ZEROS:
+        return np.zeros(shape, dtype=dtype)
+    if init == INIT_EMPTY:
+        return np.empty(shape, dtype=dtype)
+    raise ValueError(
+        f"Unknown weight initialization {init}, expected one of {WEIGHT_INITS}")
+
 class SpikyNode:
     """
     Class representing a spiky neuron.
     """
 
-    def __init__(self, size, spike_decay=SPIKE_DECAY_DEFAULT):
+    def __init__(self, size, spike_decay=SPIKE_DECAY_DEFAULT, weights=None):
         """
         Initializes a spike neuron.
 
         Parameters:
             size (int): Number of weights plus the bias.
             spike_decay (float): Spike decay rate for neurons.
+            weights (ndarray): Initial weights and bias. Random if None.
         """
         # a list of weights and a bias (last item in the list)
 
-        self._weights = np.random.uniform(-0.3, 0.3, (size + 1))
+        if weights is None:
+            weights = init_weights(size + 1)
+        self._weights = np.array(weights, dtype=float)
         self.level = 0  # activation level
         self.buffer = RingBuffer(
-            MAX_FIRELOG_SIZE)  # tracks whether the neuron fired or not
+            MAX_FIRELOG_SIZE,
+            dtype=np.int8)  # tracks whether the neuron fired or not
         self.spike_decay = spike_decay
         self.levels_log = []
         self.fire_log = []
@@ -90,11 +136,20 @@ class SpikyNode:
         if self.buffer.length() == 0:
             return 0.0
 
-        recent_fires = self.buffer.get()
-    
-        return recent_fires.count(1)/MAX_FIRELOG_SIZE
+        return self.buffer.sum() / MAX_FIRELOG_SIZE
 
 
+    def reset(self):
+        """
+        Returns the neuron to its initial state, clearing its level, fire history and
+        logs. The weights are kept.
+        """
+        self.level = 0
+        self.buffer.clear()
+        self.levels_log = []
+        self.fire_log = []
+        self.duty_cycle_log = []
+
     def set_weights(self, input_weights):
         """
         Sets the neuron's weights.
@@ -173,7 +228,12 @@ class SpikyLayer:
     Collection of multiple neurons (SpikyNodes).
     """
 
-    def __init__(self, num_nodes, num_inputs, spike_decay=SPIKE_DECAY_DEFAULT):
+    def __init__(self,
+                 num_nodes,
+                 num_inputs,
+                 spike_decay=SPIKE_DECAY_DEFAULT,
+                 init=INIT_RANDOM,
+                 rng=None):
         """
         Initializes a SpikyLayer.
 
@@ -181,10 +241,16 @@ class SpikyLayer:
             num_nodes (int): Number of neurons in the layer.
             num_inputs (int): Number of inputs into each neuron the layer.
             spike_decay (float): Spike decay rate for neurons
+            init (str): How to initialize the weights, one of `WEIGHT_INITS`.
+            rng (np.random.Generator): Generator for random weights.
         """
 
-        self.nodes = [SpikyNode(num_inputs, spike_decay)
-                      for _ in range(num_nodes)]
+        # One draw for the whole layer instead of one per node
+        weights = init_weights((num_nodes, num_inputs + 1), init, rng)
+        self.nodes = [
+            SpikyNode(num_inputs, spike_decay, node_weights)
+            for node_weights in weights
+        ]
 
     def compute(self, inputs):
         """
@@ -234,13 +300,389 @@ class SpikyLayer:
         """
         return [node.duty_cycle() for node in self.nodes]
 
+    def reset(self):
+        """Returns every neuron in the layer to its initial state."""
+        for node in self.nodes:
+            node.reset()
+
+    def get_levels_log(self):
+        """
+        Returns the levels log of every neuron in the layer.
+
+        Returns:
+            list: One list of activation levels per neuron.
+        """
+        return [node.get_levels_log() for node in self.nodes]
+
+    def get_fire_log(self):
+        """
+        Returns the fire log of every neuron in the layer.
+
+        Returns:
+            list: One fire log per neuron.
+        """
+        return [node.get_fire_log() for node in self.nodes]
+
+    def get_duty_cycle_log(self):
+        """
+        Returns the duty cycle log of every neuron in the layer.
+
+        Returns:
+            list: One list of duty cycles per neuron.
+        """
+        return [node.get_duty_cycle_log() for node in self.nodes]
+
+    def print_weights(self):
+        """Prints the weights and bias of every neuron in the layer."""
+        for node_index, node in enumerate(self.nodes):
+            print(f"Node {node_index}: ", end="")
+            node.print_weights()
+
+
+class VectorSpikyLayer:
+    """
+    A SpikyLayer that stores its neurons as arrays instead of SpikyNode objects.
+
+    `weights[..., i, :]` holds the weights and bias of neuron `i`, laid out like
+    `SpikyNode._weights`, and `levels[..., i]` is that neuron's activation level. Decay,
+    integration, threshold and reset are done for the whole layer at once, and the
+    weighted sums are accumulated in the same order as `SpikyNode.compute`, so both
+    layers produce bit-identical spikes.
+
+    Any leading `batch_shape` dimensions hold independent copies of the layer (for
+    example one per genome of a CMA-ES population), which are all stepped by the
+    same array operations.
+    """
+
+    def __init__(self,
+                 num_nodes,
+                 num_inputs,
+                 spike_decay=SPIKE_DECAY_DEFAULT,
+                 batch_shape=(),
+                 record=RECORD_FULL,
+                 max_steps=None,
+                 dtype=np.float64,
+                 event_driven=False,
+                 init=INIT_RANDOM,
+                 rng=None):
+        """
+        Initializes a VectorSpikyLayer.
+
+        Parameters:
+            num_nodes (int): Number of neurons in the layer.
+            num_inputs (int): Number of inputs into each neuron the layer.
+            spike_decay (float): Spike decay rate for neurons
+            batch_shape (tuple): Shape of the batch of independent layers.
+            record (str): What to record on each timestep, one of `RECORD_LEVELS`.
+                          "off" records nothing, "summary" only counts spikes and
+                          "full" also logs every neuron's level, fire and duty cycle.
+            max_steps (int): Expected rollout length, used to preallocate full logs.
+            dtype: Float type of the weights, levels and outputs. np.float32 halves
+                   memory traffic, but can shift spike timing, see
+                   `snn_controller.compare_precision()`.
+            event_driven (bool): Whether the inputs are spikes (0.0 or 1.0) from
+                                 another layer. Only the weights of inputs that fired
+                                 are then accumulated, and silent steps skip
+                                 integration. Spikes are the same either way.
+            init (str): How to initialize the weights, one of `WEIGHT_INITS`.
+            rng (np.random.Generator): Generator for random weights.
+        """
+
+        if record not in RECORD_LEVELS:
+            raise ValueError(
+                f"Unknown recording level {record}, expected one of {RECORD_LEVELS}")
+
+        self.num_nodes = num_nodes
+        self.num_inputs = num_inputs
+        self.spike_decay = spike_decay
+        self.batch_shape = tuple(batch_shape)
+        self.record = record
+        self.dtype = np.dtype(dtype)
+        self.event_driven = event_driven
+        shape = (*self.batch_shape, num_nodes)
+
+        self.weights = init_weights((*shape, num_inputs + 1), init, rng,
+                                    self.dtype)
+        self.levels = np.zeros(shape, dtype=self.dtype)
+
+        # Last `MAX_FIRELOG_SIZE` fires of every neuron
+        self.fire_history = ArrayRingBuffer(MAX_FIRELOG_SIZE, shape)
+
+        # Scratch arrays reused on every step, so stepping allocates nothing
+        self.outputs = np.zeros(shape, dtype=self.dtype)
+        self._fired = np.zeros(shape, dtype=bool)
+        self._weighted_sum = np.zeros(shape, dtype=self.dtype)
+        self._product = np.zeros(shape, dtype=self.dtype)
+        self._spiking = np.zeros((*self.batch_shape, num_inputs), dtype=bool)
+
+        self.steps = 0
+        self.spike_counts = np.zeros(shape, dtype=np.int64)
+        self.log = NeuronLog(shape, max_steps, self.dtype,
+                             MAX_FIRELOG_SIZE) if record == RECORD_FULL else None
+
+        # Probes (see snn.probes) recording some of this layer's neurons. They
+        # get each step's fire counts over the last `MAX_FIRELOG_SIZE` steps and
+        # compute duty cycles from them only where they need them.
+        self.probes = []
+
+    def compute(self, inputs):
+        """
+        Feeds input to every neuron in the layer and returns their output.
+
+        Parameters:
+            inputs (ndarray): Inputs into this layer, shaped (*batch_shape, num_inputs).
+                              Inputs shaped (num_inputs,) are fed to every layer in
+                              the batch.
+
+        Returns:
+            tuple: (an array of all neuron outputs, an array of all neuron levels).
+                   Both arrays are reused, and overwritten, on the next step.
+        """
+
+        inputs = np.asarray(inputs, dtype=self.dtype)
+
+        self.levels *= (1 - self.spike_decay)
+
+        if inputs.shape[-1:] != (self.num_inputs,):
+            print(f"Error: {inputs.shape[-1:]} inputs vs {self.num_inputs + 1} \
+                  weights; weights: {self.weights}")
+            return np.zeros_like(self.levels), self.levels.copy()
+
+        if self.event_driven:
+            self._integrate_spikes(inputs)
+        else:
+            # Accumulate input by input, like the generator sum in SpikyNode.compute
+            weighted_sum = self._weighted_sum
+            weighted_sum.fill(0)
+            for i in range(self.num_inputs):
+                np.multiply(inputs[..., i, None],
+                            self.weights[..., i],
+                            out=self._product)
+                weighted_sum += self._product
+
+            self.levels += weighted_sum
+
+        return self._fire()
+
+    def run(self, input_sequence):
+        """
+        Feeds a sequence of inputs to the layer, one timestep after another. The inputs
+        are all known up front, so they are weighted for every timestep at once, and
+        only decay, threshold and reset are stepped through time.
+
+        Parameters:
+            input_sequence (ndarray): Inputs shaped (steps, *batch_shape, num_inputs),
+                                      or (steps, num_inputs) to feed every layer in
+                                      the batch the same inputs.
+
+        Returns:
+            tuple: (outputs, levels), both shaped (steps, *batch_shape, num_nodes).
+        """
+
+        input_sequence = np.asarray(input_sequence, dtype=self.dtype)
+
+        if input_sequence.shape[-1:] != (self.num_inputs,):
+            raise ValueError(f"Expected {self.num_inputs} inputs per step, got "
+                             f"shape {input_sequence.shape}.")
+
+        steps = len(input_sequence)
+        if input_sequence.ndim == 2:
+            input_sequence = input_sequence.reshape(
+                (steps, *[1] * len(self.batch_shape), self.num_inputs))
+
+        # Same order of accumulation as compute()
+        weighted_sums = np.zeros((steps, *self.levels.shape), dtype=self.dtype)
+        for i in range(self.num_inputs):
+            weighted_sums += input_sequence[..., i, None] * self.weights[..., i]
+
+        outputs = np.empty_like(weighted_sums)
+        levels = np.empty_like(weighted_sums)
+        for step in range(steps):
+            self.levels *= (1 - self.spike_decay)
+            self.levels += weighted_sums[step]
+            outputs[step], levels[step] = self._fire()
+
+        return outputs, levels
+
+    def _fire(self):
+        """
+        Fires the neurons whose level reached their bias, records the timestep and
+        resets the neurons that fired.
+
+        Returns:
+            tuple: (an array of all neuron outputs, an array of all neuron levels).
+                   Both arrays are reused, and overwritten, on the next step.
+        """
+
+        np.greater_equal(self.levels, self.weights[..., -1], out=self._fired)
+        self.fire_history.add(self._fired)
+
+        if self.record != RECORD_OFF:
+            self.spike_counts += self._fired
+        if self.record == RECORD_FULL:
+            # Duty cycles are computed from the log's fires when asked for
+            self.log.record(self.levels, self._fired)
+        if self.probes:
+            fire_counts = self.fire_history.sum()
+            for probe in self.probes:
+                probe.record(self.steps, self.levels, self._fired, fire_counts)
+
+        self.steps += 1
+
+        np.copyto(self.levels, 0, where=self._fired)
+        np.copyto(self.outputs, self._fired)
+
+        return self.outputs, self.levels
+
+    def _integrate_spikes(self, inputs):
+        """
+        Adds the weights of the inputs that spiked to the levels. Adding a weight
+        exactly where its input is 1.0 gives the same sums as multiplying every
+        weight by its 0.0 or 1.0 input, in the same order.
+
+        Parameters:
+            inputs (ndarray): Spikes (0.0 or 1.0) shaped (*batch_shape, num_inputs).
+        """
+        np.not_equal(inputs, 0, out=self._spiking)
+        active_inputs = np.flatnonzero(
+            self._spiking.reshape(-1, self.num_inputs).any(axis=0))
+
+        if active_inputs.size == 0:
+            return  # Silent step, nothing to integrate
+
+        weighted_sum = self._weighted_sum
+        weighted_sum.fill(0)
+        for i in active_inputs:
+            np.add(weighted_sum,
+                   self.weights[..., i],
+                   out=weighted_sum,
+                   where=self._spiking[..., i, None])
+
+        self.levels += weighted_sum
+
+    def set_weights(self, input_weights):
+        """
+        Sets weights for all the neurons in the layer.
+
+        Parameters:
+            input_weights (list): List of weights for all neurons in the layer. Batched
+                                  layers take an array shaped
+                                  (*batch_shape, num_nodes * (num_inputs + 1)).
+        """
+        if np.size(input_weights) != self.weights.size:
+            print("Weight size mismatch in layer")
+            return
+
+        # Written in place, as the weights may be a view of a SpikyNet's parameters
+        self.weights[...] = np.reshape(input_weights, self.weights.shape)
+        np.abs(self.weights[..., :-1], out=self.weights[..., :-1])
+
+    def reset(self):
+        """
+        Returns every neuron in the layer to its initial state, clearing levels, fire
+        history, spike counts and logs. The weights are kept.
+        """
+        self.levels.fill(0)
+        self.fire_history.clear()
+        self.steps = 0
+        self.spike_counts.fill(0)
+        if self.log is not None:
+            self.log.clear()
+
+    def bind_weights(self, buffer):
+        """
+        Makes `weights` a view of `buffer`, whose values become the layer's weights.
+
+        Parameters:
+            buffer (ndarray): Array shaped (*batch_shape, num_nodes * (num_inputs + 1)).
+        """
+        self.weights = buffer.reshape(self.weights.shape)
+        if not np.shares_memory(self.weights, buffer):
+            raise ValueError("Weight buffer can't be viewed as a weight matrix.")
+
+    def duty_cycles(self):
+        """
+        Returns the duty cycles for the neurons in the layer.
+
+        Returns:
+            ndarray: What percent of the last `MAX_FIRELOG_SIZE` timesteps each neuron
+                     fired, in decimal form.
+        """
+        return self.fire_history.sum() / MAX_FIRELOG_SIZE
+
+    def _per_node(self, log):
+        """
+        Turns a log with one row per timestep into one list per neuron.
+
+        Parameters:
+            log (ndarray): Log shaped (steps, *batch_shape, num_nodes).
+
+        Returns:
+            list: One list of values per neuron, nested inside one list per batch
+                  dimension. Empty lists if the layer doesn't keep full logs.
+        """
+        if log is None:
+            return np.zeros((*self.batch_shape, self.num_nodes, 0)).tolist()
+        return np.moveaxis(log, 0, -1).tolist()
+
+    def get_levels_log(self):
+        """
+        Returns the levels log of every neuron in the layer.
+
+        Returns:
+            list: One list of activation levels per neuron.
+        """
+        return self._per_node(
+            self.log.get_levels() if self.log else None)
+
+    def get_fire_log(self):
+        """
+        Returns the fire log of every neuron in the layer.
+
+        Returns:
+            list: One fire log per neuron.
+        """
+        return self._per_node(
+            self.log.get_fires() if self.log else None)
+
+    def get_duty_cycle_log(self):
+        """
+        Returns the duty cycle log of every neuron in the layer.
+
+        Returns:
+            list: One list of duty cycles per neuron.
+        """
+        return self._per_node(
+            self.log.get_duty_cycles() if self.log else None)
+
+    def print_weights(self):
+        """Prints the weights and bias of every neuron in the layer."""
+        if self.batch_shape:
+            print(self.weights)
+            return
+        for node_index, node_weights in enumerate(self.weights):
+            print(f"Node {node_index}: ", end="")
+            print(node_weights)
+
 
 class SpikyNet:
     """
     Combines multiple spiky hidden layers and one output layer.
     """
 
-    def __init__(self, input_size, hidden_sizes, output_size, spike_decay=SPIKE_DECAY_DEFAULT):
+    def __init__(self,
+                 input_size,
+                 hidden_sizes,
+                 output_size,
+                 spike_decay=SPIKE_DECAY_DEFAULT,
+                 vectorized=True,
+                 batch_shape=(),
+                 record=RECORD_FULL,
+                 max_steps=None,
+                 dtype=np.float64,
+                 event_driven=False,
+                 init=INIT_RANDOM,
+                 rng=None):
         """
         Initializes network.
         
@@ -249,16 +691,111 @@ class SpikyNet:
             hidden_sizes (list): List containing number of neurons in each hidden layer.
             output_size (int): Number of outputs.
             spike_decay (float): Spike decay rate for neurons
+            vectorized (bool): Whether to use VectorSpikyLayers, or the per-node
+                               SpikyLayers.
+            batch_shape (tuple): Shape of a batch of independent networks to step
+                                 together, e.g. (POP_SIZE,) for a whole CMA-ES
+                                 population. Requires `vectorized`.
+            record (str): What the layers record on each timestep, one of
+                          `RECORD_LEVELS`. Per-node layers always record everything.
+            max_steps (int): Expected rollout length, used to preallocate full logs.
+            dtype: Float type the vectorized layers compute in, np.float64 or
+                   np.float32.
+            event_driven (bool): Whether layers fed by another layer only accumulate
+                                 the weights of inputs that spiked. Pays off for wide
+                                 hidden layers with low firing rates.
+            init (str): How to initialize the weights, one of `WEIGHT_INITS`. Use
+                        INIT_ZEROS or INIT_EMPTY when a genome will be loaded anyway.
+            rng (np.random.Generator): Generator for random weights. Vectorized
+                                       networks draw all their weights in one call.
+        """
+
+        if batch_shape and not vectorized:
+            raise ValueError("Only vectorized SpikyNets can be batched.")
+        if record != RECORD_FULL and not vectorized:
+            raise ValueError("Per-node SpikyNets always record full logs.")
+        if np.dtype(dtype) != np.float64 and not vectorized:
+            raise ValueError("Per-node SpikyNets always compute in float64.")
+
+        self.vectorized = vectorized
+        self.batch_shape = tuple(batch_shape)
+        self.record = record
+        self.max_steps = max_steps
+        self.dtype = np.dtype(dtype)
+        self.event_driven = event_driven
+        self.init = init
+        self.rng = rng
+
+        # Where each layer's weights sit in a flat parameter vector, laid out like one
+        # SNN of a genome
+        self.layout = GenomeLayout(int(np.prod(self.batch_shape)), input_size,
+                                   hidden_sizes, output_size)
+        self.param_slices = [(layer.start, layer.end)
+                             for layer in self.layout.layers]
+        self.num_params = self.layout.params_per_snn
+
+        # Every layer but the first is fed spikes
+        *hidden_layouts, output_layout = self.layout.layers
+        self.hidden_layers = [
+            self._make_layer(layer.num_nodes, layer.num_inputs, spike_decay,
+                             self.event_driven and i > 0)
+            for i, layer in enumerate(hidden_layouts)
+        ]
+        self.output_layer = self._make_layer(
+            output_layout.num_nodes,
+            output_layout.num_inputs,
+            event_driven=self.event_driven and bool(hidden_layouts))
+
+        # Vectorized layers keep their weights in one flat parameter buffer laid out
+        # like a genome, so loading a genome is one copy and one abs() pass
+        self.params = None
+        self.weight_mask = None  # True for weights, False for biases
+        if vectorized:
+            self.params = init_weights((*self.batch_shape, self.num_params),
+                                       init, rng, self.dtype)
+            self.weight_mask = np.ones(self.num_params, dtype=bool)
+            for layer, layer_layout in zip(self.layers, self.layout.layers):
+                layer.bind_weights(self.params[...,
+                                               layer_layout.start:layer_layout.end])
+                self.weight_mask[list(layer_layout.bias_positions)] = False
+
+    def _make_layer(self,
+                    num_nodes,
+                    num_inputs,
+                    spike_decay=SPIKE_DECAY_DEFAULT,
+                    event_driven=False):
+        """
+        Builds a layer.
+
+        Parameters:
+            num_nodes (int): Number of neurons in the layer.
+            num_inputs (int): Number of inputs into each neuron the layer.
+            spike_decay (float): Spike decay rate for neurons
+            event_driven (bool): Whether the layer only accumulates the weights of
+                                 inputs that spiked.
+
+        Returns:
+            The new VectorSpikyLayer or SpikyLayer.
         """
+        if self.vectorized:
+            # Weights are created with the net's parameter buffer, see __init__
+            return VectorSpikyLayer(num_nodes, num_inputs, spike_decay,
+                                    self.batch_shape, self.record,
+                                    self.max_steps, self.dtype, event_driven,
+                                    INIT_EMPTY)
+        return SpikyLayer(num_nodes, num_inputs, spike_decay, self.init,
+                          self.rng)
 
-        self.hidden_layers = []
-        prev_size = input_size
-        for hidden_size in hidden_sizes:
-            layer = SpikyLayer(int(hidden_size), prev_size, spike_decay)
-            self.hidden_layers.append(layer)
-            prev_size = hidden_size
+    @property
+    def layers(self):
+        """All hidden layers followed by the output layer."""
+        return self.hidden_layers + [self.output_layer]
 
-        self.output_layer = SpikyLayer(output_size, prev_size)
+    @property
+    def layer_names(self):
+        """Names of `layers` as used in logs: 'hidden0', 'hidden1', ..., 'output'."""
+        return [f'hidden{j}'
+                for j in range(len(self.hidden_layers))] + ['output']
 
     def compute(self, inputs):
         """
@@ -278,6 +815,31 @@ class SpikyNet:
         output, levels = self.output_layer.compute(current_output)
         return output, levels
 
+    def run(self, input_sequence):
+        """
+        Passes a whole sequence of inputs through the network. Runs one layer at a
+        time over every timestep, so each layer weights its inputs for all timesteps
+        at once. Gives the same spikes, levels and logs as calling `compute()` on each
+        step.
+
+        Parameters:
+            input_sequence (ndarray): Inputs shaped (steps, *batch_shape, input_size).
+
+        Returns:
+            tuple: (output spikes, output levels), both shaped
+                   (steps, *batch_shape, output_size).
+        """
+        if not self.vectorized:
+            outputs = [self.compute(inputs) for inputs in input_sequence]
+            return (np.array([spikes for spikes, _ in outputs]),
+                    np.array([levels for _, levels in outputs]))
+
+        current_output = input_sequence
+        for layer in self.hidden_layers:
+            current_output, _ = layer.run(current_output)
+
+        return self.output_layer.run(current_output)
+
     def set_weights(self, input_weights):
         """
         Assigns weights to all hidden layers and the output layer.
@@ -293,16 +855,43 @@ class SpikyNet:
 
         self.output_layer.set_weights(input_weights['output_layer'])
 
+    def reset(self):
+        """Returns every layer to its initial state, keeping the weights."""
+        for layer in self.layers:
+            layer.reset()
+
+    def set_flat_weights(self, params):
+        """
+        Assigns weights from flat parameter vectors holding every layer's weights and
+        biases back to back, the way each network's slice of a CMA-ES genome is laid out.
+
+        Parameters:
+            params (ndarray): Parameters shaped (*batch_shape, num_params).
+
+        Raises:
+            ValueError: If `params` does not have `num_params` parameters per network.
+        """
+        params = np.asarray(params)
+
+        if params.shape[-1:] != (self.num_params,):
+            raise ValueError(f"Expected {self.num_params} parameters per "
+                             f"network, got shape {params.shape}.")
+
+        if self.params is None:
+            for layer, (start, end) in zip(self.layers, self.param_slices):
+                layer.set_weights(params[..., start:end])
+            return
+
+        # Weights (but not biases) are non-negative, like in SpikyNode.set_weights
+        np.copyto(self.params, params, casting='same_kind')
+        np.abs(self.params, out=self.params, where=self.weight_mask)
+
     def print_structure(self):
         """Displays the network weights."""
         for idx, hidden_layer in enumerate(self.hidden_layers):
             print(f"Hidden Layer {idx}:")
-            for node_index, hidden_node in enumerate(hidden_layer.nodes):
-                print(f"Node {node_index}: ", end="")
-                hidden_node.print_weights()
+            hidden_layer.print_weights()
 
         print("\nOutput Layer:")
-        for node_index, output_node in enumerate(self.output_layer.nodes):
-            print(f"Node {node_index}: ", end="")
-            output_node.print_weights()
+        self.output_layer.print_weights()
         print("\n")
@@ -0,0 +1,116 @@
+"""
+Module for array-backed logs of neuron levels, fires and duty cycles.
+"""
+
+import numpy as np
+from snn.spikes import packed_length, unpack_spikes, duty_cycles
+
+DEFAULT_LOG_CAPACITY = 1000  # Timesteps to preallocate when the rollout length is unknown
+
+
+class NeuronLog:
+    """
+    Records the activation level and fire of a group of neurons (e.g. a layer) on
+    every timestep, into arrays preallocated for the whole rollout. Fires are stored
+    bit-packed along the time axis, and duty cycles are computed from them.
+    """
+
+    def __init__(self, shape, capacity=None, dtype=np.float64, window=10):
+        """
+        Initializes a NeuronLog.
+
+        Parameters:
+            shape (tuple): Shape of the neuron group, e.g. (*batch_shape, num_nodes).
+            capacity (int): How many timesteps to preallocate. The log doubles in size
+                            if more timesteps are recorded.
+            dtype: Float type of the level and duty cycle logs.
+            window (int): Number of timesteps per duty cycle.
+        """
+        self.shape = tuple(shape)
+        self.window = window
+        capacity = max(1, capacity or DEFAULT_LOG_CAPACITY)
+        self.levels = np.empty((capacity, *self.shape), dtype=dtype)
+        # 8 timesteps per byte, the earliest in the highest bit
+        self.fires = np.zeros((packed_length(capacity), *self.shape),
+                              dtype=np.uint8)
+        self._bits = np.zeros(self.shape, dtype=np.uint8)
+        self.steps = 0  # Number of recorded timesteps
+
+    @property
+    def capacity(self):
+        """How many timesteps fit in the log before it has to grow."""
+        return len(self.levels)
+
+    def record(self, levels, fires):
+        """
+        Records one timestep.
+
+        Parameters:
+            levels (ndarray): Activation level of each neuron.
+            fires (ndarray): Bool array, whether each neuron fired.
+        """
+        if self.steps == self.capacity:
+            self._grow()
+
+        self.levels[self.steps] = levels
+
+        byte, bit = divmod(self.steps, 8)
+        fired = fires.view(np.uint8)
+        if bit == 0:
+            np.left_shift(fired, 7, out=self.fires[byte])
+        else:
+            np.left_shift(fired, 7 - bit, out=self._bits)
+            np.bitwise_or(self.fires[byte], self._bits, out=self.fires[byte])
+        self.steps += 1
+
+    def _grow(self):
+        """Doubles the number of timesteps the log can hold."""
+        levels = np.empty((2 * self.capacity, *self.shape),
+                          dtype=self.levels.dtype)
+        levels[:self.capacity] = self.levels
+        fires = np.zeros((packed_length(len(levels)), *self.shape),
+                         dtype=np.uint8)
+        fires[:len(self.fires)] = self.fires
+        self.levels = levels
+        self.fires = fires
+
+    def get_levels(self):
+        """
+        Returns the recorded activation levels.
+
+        Returns:
+            ndarray: View shaped (steps, *shape).
+        """
+        return self.levels[:self.steps]
+
+    def get_packed_fires(self):
+        """
+        Returns the recorded fires, bit-packed along the time axis.
+
+        Returns:
+            ndarray: View shaped (packed_length(steps), *shape), see `snn.spikes`.
+        """
+        return self.fires[:packed_length(self.steps)]
+
+    def get_fires(self):
+        """
+        Returns the recorded fires.
+
+        Returns:
+            ndarray: Array shaped (steps, *shape), 1 where a neuron fired.
+        """
+        return unpack_spikes(self.get_packed_fires(), self.steps, axis=0)
+
+    def get_duty_cycles(self):
+        """
+        Returns the duty cycles at every recorded timestep.
+
+        Returns:
+            ndarray: Array shaped (steps, *shape).
+        """
+        return duty_cycles(self.get_packed_fires(), self.steps, self.window,
+                           axis=0).astype(self.levels.dtype, copy=False)
+
+    def clear(self):
+        """Forgets all recorded timesteps, keeping the allocated arrays."""
+        self.steps = 0
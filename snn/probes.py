@@ -0,0 +1,325 @@
+"""
+Module for recording the traces of a few chosen neurons, instead of full SNN logs.
+
+A Probe names (snn_id, layer, neuron) targets and the signals to record for them,
+optionally only every `every`-th step and only inside a [start, stop) window. Once
+attached to a vectorized SpikyNet (or added to an SNNController), the targeted layers
+hand it their state on every step, and it keeps only the probed values.
+"""
+
+import math
+import numpy as np
+from snn.neuron_log import DEFAULT_LOG_CAPACITY
+from snn.model_struct import MAX_FIRELOG_SIZE
+
+SIGNAL_LEVEL = "level"
+SIGNAL_SPIKE = "spike"
+SIGNAL_DUTY_CYCLE = "duty_cycle"
+PROBE_SIGNALS = (SIGNAL_LEVEL, SIGNAL_SPIKE, SIGNAL_DUTY_CYCLE)
+
+
+class Probe:
+    """
+    Records chosen signals of chosen neurons of an SNN.
+    """
+
+    def __init__(self,
+                 targets,
+                 signals=PROBE_SIGNALS,
+                 every=1,
+                 start=0,
+                 stop=None,
+                 max_steps=None):
+        """
+        Initializes a Probe.
+
+        Parameters:
+            targets (list): (snn_id, layer, neuron) tuples to record, e.g.
+                            (3, 'hidden0', 1). Layers are named like in
+                            `SNNController.get_fire_log()`.
+            signals (tuple): Which of `PROBE_SIGNALS` to record.
+            every (int): Record every `every`-th step.
+            start (int): First step to record.
+            stop (int): Step to stop recording at (exclusive), or None for no limit.
+            max_steps (int): Expected rollout length, used to preallocate storage
+                             when `stop` is None.
+        """
+        if not signals:
+            raise ValueError(
+                f"Probes need at least one signal, expected some of {PROBE_SIGNALS}")
+        for signal in signals:
+            if signal not in PROBE_SIGNALS:
+                raise ValueError(
+                    f"Unknown probe signal {signal}, expected one of {PROBE_SIGNALS}")
+        if every < 1:
+            raise ValueError("Probes must record at least every step (every >= 1).")
+
+        self.targets = [tuple(target) for target in targets]
+        self.signals = tuple(signals)
+        self.every = every
+        self.start = start
+        self.stop = stop
+
+        end = stop if stop is not None else max_steps
+        if end is None:
+            self.capacity = DEFAULT_LOG_CAPACITY
+        else:
+            self.capacity = max(1, math.ceil((end - start) / every))
+
+        self.layer_probes = []
+
+    def attach(self, net):
+        """
+        Hooks the probe into the layers of `net` that hold a target.
+
+        Parameters:
+            net (SpikyNet): A vectorized SpikyNet, either unbatched or batched over
+                            SNNs, like `SNNController.net`.
+        """
+        if not net.vectorized or len(net.batch_shape) > 1:
+            raise ValueError(
+                "Probes need a vectorized SpikyNet with at most one batch dimension.")
+
+        missing = {name for _, name, _ in self.targets} - set(net.layer_names)
+        if missing:
+            raise ValueError(f"Probe targets unknown layers: {sorted(missing)}")
+
+        # Unbatched nets hold a single SNN, with ID 0
+        num_snn = net.batch_shape[0] if net.batch_shape else 1
+        layer_sizes = dict(
+            zip(net.layer_names, (layer.num_nodes for layer in net.layers)))
+        for target in self.targets:
+            snn_id, layer_name, neuron = target
+            if not 0 <= snn_id < num_snn:
+                raise ValueError(
+                    f"Probe target {target} names SNN {snn_id}, but the net has "
+                    f"{num_snn} SNNs.")
+            if not 0 <= neuron < layer_sizes[layer_name]:
+                raise ValueError(
+                    f"Probe target {target} names neuron {neuron}, but layer "
+                    f"{layer_name} has {layer_sizes[layer_name]} neurons.")
+
+        self.detach()
+
+        for layer_name, layer in zip(net.layer_names, net.layers):
+            layer_targets = [(snn_id, neuron)
+                             for snn_id, name, neuron in self.targets
+                             if name == layer_name]
+            if not layer_targets:
+                continue
+            layer_probe = LayerProbe(self, layer_name, layer_targets,
+                                     layer.levels.shape)
+            layer.probes.append(layer_probe)
+            self.layer_probes.append((layer, layer_probe))
+
+    def detach(self):
+        """Unhooks the probe from the layers it is attached to."""
+        for layer, layer_probe in self.layer_probes:
+            layer.probes.remove(layer_probe)
+        self.layer_probes = []
+
+    def wants(self, step):
+        """
+        Whether the probe records the given step.
+
+        Parameters:
+            step (int): Timestep, counting from zero.
+
+        Returns:
+            bool: True if `step` is inside the window and on the decimation grid.
+        """
+        if step < self.start or (self.stop is not None and step >= self.stop):
+            return False
+        return (step - self.start) % self.every == 0
+
+    def get_steps(self):
+        """
+        Returns the timesteps that were recorded.
+
+        Returns:
+            ndarray: Step number of each recorded sample.
+        """
+        count = self.layer_probes[0][1].count if self.layer_probes else 0
+        return self.start + self.every * np.arange(count)
+
+    def _get_log(self, signal):
+        """
+        Gathers the recorded samples of one signal.
+
+        Parameters:
+            signal (str): One of `PROBE_SIGNALS`.
+
+        Returns:
+            dict: {snn_id: {layer: {neuron: samples}}}, empty if `signal` is
+                  not recorded.
+        """
+        logs = {}
+        if signal not in self.signals:
+            return logs
+        for _, layer_probe in self.layer_probes:
+            samples = layer_probe.get(signal)
+            for column, (snn_id, neuron) in enumerate(layer_probe.targets):
+                logs.setdefault(snn_id, {}).setdefault(
+                    layer_probe.layer_name, {})[neuron] = samples[:, column]
+        return logs
+
+    def get_levels_log(self):
+        """
+        Return the probed activation levels.
+
+        Returns:
+            dict: {snn_id: {layer: {neuron: levels}}}, shaped like
+                  `SNNController.get_levels_log()` but holding only probed neurons.
+        """
+        return self._get_log(SIGNAL_LEVEL)
+
+    def get_fire_log(self):
+        """
+        Return the probed fire logs.
+
+        Returns:
+            dict: {snn_id: {layer: {neuron: fires}}}, shaped like
+                  `SNNController.get_fire_log()` but holding only probed neurons.
+        """
+        return self._get_log(SIGNAL_SPIKE)
+
+    def get_duty_cycle_log(self):
+        """
+        Return the probed duty cycles.
+
+        Returns:
+            dict: {snn_id: {layer: {neuron: duty_cycles}}}, shaped like
+                  `SNNController.get_duty_cycle_log()` but holding only probed neurons.
+        """
+        return self._get_log(SIGNAL_DUTY_CYCLE)
+
+    def get_table(self, signals=None):
+        """
+        Gathers the recorded samples into one array, for bulk export.
+
+        Parameters:
+            signals (tuple): Recorded signals to include, in order. All recorded
+                             signals if None.
+
+        Returns:
+            tuple: (targets, values). `targets` lists the (snn_id, layer, neuron) of
+                   each probed neuron, ordered like the nested dictionaries of
+                   `get_levels_log()`. `values` is a float array shaped
+                   (len(targets), len(signals), samples).
+        """
+        if signals is None:
+            signals = self.signals
+
+        # Same grouping as _get_log(), a neuron probed twice is kept once
+        columns = {}
+        for _, layer_probe in self.layer_probes:
+            for column, (snn_id, neuron) in enumerate(layer_probe.targets):
+                columns.setdefault(snn_id, {}).setdefault(
+                    layer_probe.layer_name, {})[neuron] = (layer_probe, column)
+
+        targets = []
+        sources = []
+        for snn_id, layers in columns.items():
+            for layer_name, neurons in layers.items():
+                for neuron, source in neurons.items():
+                    targets.append((snn_id, layer_name, neuron))
+                    sources.append(source)
+
+        count = self.layer_probes[0][1].count if self.layer_probes else 0
+        values = np.empty((len(targets), len(signals), count))
+        for row, (layer_probe, column) in enumerate(sources):
+            for i, signal in enumerate(signals):
+                values[row, i] = layer_probe.get(signal)[:, column]
+        return targets, values
+
+    def clear(self):
+        """Forgets all recorded samples."""
+        for _, layer_probe in self.layer_probes:
+            layer_probe.count = 0
+
+
+class LayerProbe:
+    """
+    The part of a Probe that records the targets in one layer.
+    """
+
+    def __init__(self, probe, layer_name, targets, layer_shape):
+        """
+        Initializes a LayerProbe.
+
+        Parameters:
+            probe (Probe): The probe this belongs to.
+            layer_name (str): Name of the layer, e.g. 'hidden0' or 'output'.
+            targets (list): (snn_id, neuron) pairs in this layer.
+            layer_shape (tuple): Shape of the layer's state, (num_nodes,) or
+                                 (num_snn, num_nodes).
+        """
+        self.probe = probe
+        self.layer_name = layer_name
+        self.targets = targets
+
+        if len(layer_shape) == 1:
+            index = ([neuron for _, neuron in targets],)
+        else:
+            index = ([snn_id for snn_id, _ in targets],
+                     [neuron for _, neuron in targets])
+        # Positions of the targets in the layer's flattened state
+        self.indices = np.ravel_multi_index(index, layer_shape)
+
+        dtypes = {
+            SIGNAL_LEVEL: float,
+            SIGNAL_SPIKE: np.int8,
+            SIGNAL_DUTY_CYCLE: float
+        }
+        self.samples = {
+            signal: np.empty((probe.capacity, len(targets)),
+                             dtype=dtypes[signal])
+            for signal in probe.signals
+        }
+        self.count = 0  # Number of recorded samples
+
+    def record(self, step, levels, fired, fire_counts):
+        """
+        Records the targets' state, if the probe wants this step.
+
+        Parameters:
+            step (int): Timestep, counting from zero.
+            levels (ndarray): Activation level of every neuron in the layer.
+            fired (ndarray): Whether every neuron in the layer fired.
+            fire_counts (ndarray): Fires of every neuron in the layer in the last
+                                   `MAX_FIRELOG_SIZE` steps.
+        """
+        if not self.probe.wants(step):
+            return
+
+        if self.count == len(next(iter(self.samples.values()))):
+            self._grow()
+
+        for signal, samples in self.samples.items():
+            if signal == SIGNAL_DUTY_CYCLE:
+                # In the layer's precision, like the layer's own duty cycles
+                samples[self.count] = (fire_counts.reshape(-1)[self.indices] /
+                                       MAX_FIRELOG_SIZE).astype(levels.dtype)
+            else:
+                state = levels if signal == SIGNAL_LEVEL else fired
+                samples[self.count] = state.reshape(-1)[self.indices]
+        self.count += 1
+
+    def _grow(self):
+        """Doubles the number of samples that fit in storage."""
+        for signal, old in self.samples.items():
+            new = np.empty((2 * len(old), old.shape[1]), dtype=old.dtype)
+            new[:len(old)] = old
+            self.samples[signal] = new
+
+    def get(self, signal):
+        """
+        Returns the recorded samples of one signal.
+
+        Parameters:
+            signal (str): One of the probe's signals.
+
+        Returns:
+            ndarray: View shaped (samples, len(targets)).
+        """
+        return self.samples[signal][:self.count]
@@ -9,15 +9,22 @@ import numpy as np
 class RingBuffer:
     """ Implements a partially-full circular buffer. """
 
-    def __init__(self, buffsize: int):
+    def __init__(self, buffsize: int, dtype=object):
         """
         Initializes the RingBuffer.
 
         Parameters:
             buffsize (int): How big the RingBuffer should be.
+            dtype: Type of the stored values. Numeric types (e.g. np.int8, bool or
+                   float) keep a running sum of the buffer, see `sum()`.
         """
         self.buffsize = buffsize
-        self.data = np.full(buffsize, None, dtype=object)  # Explicitly initialize with None
+        self.numeric = np.dtype(dtype) != np.dtype(object)
+        if self.numeric:
+            self.data = np.zeros(buffsize, dtype=dtype)
+        else:
+            self.data = np.full(buffsize, None, dtype=object)  # Explicitly initialize with None
+        self.total = 0  # Running sum of the stored values, for numeric buffers
         self.currpos = 0  # Position where the next element should be added
         self.is_full = False  # Flag to indicate if the buffer is full
 
@@ -28,10 +35,20 @@ class RingBuffer:
         Parameters:
             value: The value to be added.
         """
-        self.data[self.currpos] = value
+        if self.numeric:
+            # Slots that were never written hold zero. The sum is updated from the
+            # stored values, so it sees what the dtype made of `value`.
+            old = self.data.item(self.currpos)
+            self.data[self.currpos] = value
+            self.total += self.data.item(self.currpos) - old
+        else:
+            self.data[self.currpos] = value
         self.currpos = (self.currpos + 1) % self.buffsize
         if self.currpos == 0:
             self.is_full = True
+            if self.data.dtype.kind == 'f':
+                # Recompute once per wrap so float rounding can't build up
+                self.total = self.data.sum().item()
 
     def get(self, n: int = None) -> list:
         """
@@ -58,6 +75,17 @@ class RingBuffer:
             return buffer_list  # Return full buffer
         return buffer_list[-min(n, len(buffer_list)):]  # Return the latest `n` elements
 
+    def sum(self):
+        """
+        Returns the sum of the elements in the buffer in O(1).
+
+        Returns:
+            The sum of all stored values. Only available for numeric buffers.
+        """
+        if not self.numeric:
+            raise TypeError("Only numeric RingBuffers keep a running sum.")
+        return self.total
+
     def length(self) -> int:
         """
         Returns the current number of elements in the buffer.
@@ -80,6 +108,97 @@ class RingBuffer:
         """
         Resets the buffer, removing all stored elements. 
         """
-        self.data.fill(None)
+        self.data.fill(0 if self.numeric else None)
+        self.total = 0
+        self.currpos = 0
+        self.is_full = False
+
+
+class ArrayRingBuffer:
+    """
+    A circular buffer of equally shaped numeric arrays, e.g. whether each neuron of a
+    layer fired on each of the last few timesteps. Keeps a running sum over the
+    buffer, so per-element totals cost O(1) per timestep.
+    """
+
+    def __init__(self, buffsize: int, shape: tuple, dtype=np.int8):
+        """
+        Initializes the ArrayRingBuffer.
+
+        Parameters:
+            buffsize (int): How many arrays the buffer holds.
+            shape (tuple): Shape of each stored array.
+            dtype: Numeric type of the stored values.
+        """
+        self.buffsize = buffsize
+        self.data = np.zeros((buffsize, *shape), dtype=dtype)
+        sum_dtype = float if self.data.dtype.kind == 'f' else np.int64
+        self.total = np.zeros(shape, dtype=sum_dtype)  # Running sum over the buffer
+        self.currpos = 0  # Position where the next array should be added
+        self.is_full = False  # Flag to indicate if the buffer is full
+
+    def add(self, values: np.ndarray) -> None:
+        """
+        Adds an array at the end of the buffer, overwriting the oldest one when full.
+
+        Parameters:
+            values (ndarray): The values to be added, broadcastable to `shape`.
+        """
+        slot = self.data[self.currpos]
+        self.total -= slot
+        slot[...] = values
+        self.total += slot
+        self.currpos = (self.currpos + 1) % self.buffsize
+        if self.currpos == 0:
+            self.is_full = True
+            if self.data.dtype.kind == 'f':
+                # Recompute once per wrap so float rounding can't build up
+                self.data.sum(axis=0, out=self.total)
+
+    def get(self) -> np.ndarray:
+        """
+        Returns the stored arrays, oldest first.
+
+        Returns:
+            ndarray: Array shaped (length(), *shape).
+        """
+        if self.is_full:
+            return np.concatenate(
+                (self.data[self.currpos:], self.data[:self.currpos]))
+        return self.data[:self.currpos].copy()
+
+    def sum(self) -> np.ndarray:
+        """
+        Returns the element-wise sum of the stored arrays in O(1).
+
+        Returns:
+            ndarray: The running sum. This array is updated in place by `add()`.
+        """
+        return self.total
+
+    def length(self) -> int:
+        """
+        Returns the current number of arrays in the buffer.
+
+        Returns:
+            int: Current number of arrays in the buffer.
+        """
+        return self.buffsize if self.is_full else self.currpos
+
+    def is_empty(self) -> bool:
+        """
+        Whether the buffer is empty.
+
+        Returns:
+            bool: True if the buffer is empty, False otherwise.
+        """
+        return self.currpos == 0 and not self.is_full
+
+    def clear(self) -> None:
+        """
+        Resets the buffer, removing all stored arrays.
+        """
+        self.data.fill(0)
+        self.total.fill(0)
         self.currpos = 0
         self.is_full = False
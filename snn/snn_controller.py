@@ -9,11 +9,14 @@ from datetime import datetime
 import json
 import os
 from pathlib import Path
-import pandas as pd
 import numpy as np
 import sys
 import matplotlib.pyplot as plt
-from snn.model_struct import SpikyNet, SPIKE_DECAY_DEFAULT
+from snn.model_struct import SpikyNet, SPIKE_DECAY_DEFAULT, RECORD_FULL, INIT_ZEROS
+from snn.genome_layout import GenomeLayout, get_genome_layout
+from snn.probes import SIGNAL_LEVEL, SIGNAL_SPIKE, SIGNAL_DUTY_CYCLE
+from snn.snn_log import LOG_NAMES, LOG_FILE_SUFFIX, log_frame, save_snn_log
+from snn.log_stream import LogStream, DEFAULT_CHUNK_STEPS
 
 # Constants for SNN configuration
 MIN_LENGTH = 0.6  # Minimum actuator length
@@ -23,6 +26,13 @@ _project_root = os.path.dirname(os.path.dirname(_current_file))
 ROBOT_DATA_PATH = os.path.join(_project_root, "morpho_demo", "world_data",
                                "bestbot.json")
 
+# The probe signal each log in SNN log files comes from
+LOG_SIGNALS = {
+    "levellog": SIGNAL_LEVEL,
+    "firelog": SIGNAL_SPIKE,
+    "dutycyclelog": SIGNAL_DUTY_CYCLE
+}
+
 
 def is_windows():
     """
@@ -42,7 +52,12 @@ class SNNController:
                  hidden_sizes,
                  output_size,
                  robot_config=ROBOT_DATA_PATH,
-                 spike_decay=SPIKE_DECAY_DEFAULT):
+                 spike_decay=SPIKE_DECAY_DEFAULT,
+                 record=RECORD_FULL,
+                 max_steps=None,
+                 dtype=np.float64,
+                 event_driven=False,
+                 layout=None):
         """
         
         Initializes an SNN Controller for a given robot and SNN hyperparameters.
@@ -52,13 +67,29 @@ class SNNController:
             hidden_sizes (list): List of numbers of nodes in hidden layers.
             output_size (int): Number of outputs.
             robot_config (str): A robot's .json file.
+            spike_decay (float): Spike decay rate for neurons.
+            record (str): What the SNNs record on each timestep: "off", "summary"
+                          (spike counts only) or "full" (every log).
+            max_steps (int): Expected rollout length, used to preallocate full logs.
+            dtype: Float type the SNNs compute in, np.float64 or np.float32.
+            event_driven (bool): Whether layers fed by hidden layers only accumulate
+                                 the weights of inputs that spiked.
+            layout (GenomeLayout): The robot's genome layout, e.g. from
+                                   `get_genome_layout()`. If given, the robot file is
+                                   not read again.
         """
-        self.snns = []
+        self.net = None  # One SpikyNet per actuator, stacked into one batch
         self.num_snn = 0  # Number of spiking neural networks (actuators)
         self.inp_size = inp_size
         self.hidden_sizes = hidden_sizes
         self.output_size = output_size
         self.spike_decay = spike_decay
+        self.record = record
+        self.max_steps = max_steps
+        self.dtype = np.dtype(dtype)
+        self.event_driven = event_driven
+        self.layout = layout
+        self.probes = []
         self._load_robot_config(robot_config)
 
     def _load_robot_config(self, robot_path):
@@ -70,18 +101,35 @@ class SNNController:
             
         """
 
-        robot_data = self._load_robot_file(robot_path)
-
-        # Count actuators (types 3 and 4)
-        self.num_snn = sum(1 for t in robot_data["types"] if t in [3, 4])
-
-        # Initialize SNN with proper dimensions
-        self.snns = [
-            SpikyNet(input_size=self.inp_size,
-                     hidden_sizes=self.hidden_sizes,
-                     output_size=self.output_size,
-                     spike_decay=self.spike_decay) for _ in range(self.num_snn)
-        ]
+        if self.layout is None:
+            robot_data = self._load_robot_file(robot_path)
+
+            # Count actuators (types 3 and 4)
+            num_snn = sum(1 for t in robot_data["types"] if t in [3, 4])
+            self.layout = GenomeLayout(num_snn, self.inp_size,
+                                       self.hidden_sizes, self.output_size)
+        elif self.layout != GenomeLayout(self.layout.num_snn, self.inp_size,
+                                         self.hidden_sizes, self.output_size):
+            raise ValueError("Genome layout does not match the SNN sizes.")
+
+        self.num_snn = self.layout.num_snn
+
+        # Initialize SNN with proper dimensions, batching the actuator networks so
+        # that each layer of every actuator is stepped by one array operation.
+        # No random weights, a genome is always loaded before use.
+        self.net = SpikyNet(input_size=self.inp_size,
+                            hidden_sizes=self.hidden_sizes,
+                            output_size=self.output_size,
+                            spike_decay=self.spike_decay,
+                            batch_shape=(self.num_snn,),
+                            record=self.record,
+                            max_steps=self.max_steps,
+                            dtype=self.dtype,
+                            event_driven=self.event_driven,
+                            init=INIT_ZEROS)
+
+        # Reused by get_lengths() for every step
+        self.actions = np.full(self.num_snn, MIN_LENGTH)
 
     def _load_robot_file(self, robot_path):
         """
@@ -106,212 +154,314 @@ class SNNController:
 
     def set_snn_weights(self, cmaes_out):
         """
-        Retrieve the flat CMA-ES output and 
-        reshape it into a structured format for the SNN's `set_weights()`.
+        Takes the flat CMA-ES output and loads it as the weights and biases of every
+        actuator's SNN. The genome holds one parameter vector per SNN, each laid out
+        layer by layer, as expected by `SpikyNet.set_flat_weights()`.
 
-        Returns:
-            snn_parameters: A dictionary containing the weights and biases for each SNN.
-                        - dict with two elements : 'hidden_layer' and 'output_layer'
-                            'hidden_layer' - weights and biases for all nodes in the hidden layer
-                            'output_layer' - weights and biases for all nodes in the output layer
-                        
-                            
         Raises:
             ValueError: If the length of the CMA-ES output does not match the expected size.
         """
 
-        flat_vector = np.array(cmaes_out)
-
-        # Compute parameters for each SNN
-        params_per_snn = 0
-        layer_input_size = self.inp_size
-
-        # Sum hidden layers
-        for hidden_size in self.hidden_sizes:
-            params_per_snn += (layer_input_size + 1) * hidden_size
-            layer_input_size = hidden_size
-
-        # Output layer
-        params_per_snn += (layer_input_size + 1) * self.output_size
+        flat_vector = np.asarray(cmaes_out)
 
-        if flat_vector.size != (self.num_snn * params_per_snn):
+        if flat_vector.size != self.layout.genome_length:
             raise ValueError(
                 f"Expected CMA-ES output vector of size "
-                f"{self.num_snn * params_per_snn}, got {flat_vector.size}.")
+                f"{self.layout.genome_length}, got {flat_vector.size}.")
 
-        reshaped = flat_vector.reshape((self.num_snn, params_per_snn))
+        self.net.set_flat_weights(
+            flat_vector.reshape((self.num_snn, self.layout.params_per_snn)))
 
-        snn_parameters = {}
-
-        for snn_idx, params_per_net in enumerate(reshaped):
-            layer_weights = []
-            start = 0
-            layer_input_size = self.inp_size
-
-            # Hidden layers
-            for hidden_size in self.hidden_sizes:
-                num_params = (layer_input_size + 1) * hidden_size
-                layer_weights.append(params_per_net[start:start + num_params])
-                start += num_params
-                layer_input_size = hidden_size
-
-            # Output layer
-            output_params = params_per_net[start:]
+    def reset(self):
+        """
+        Returns every SNN to its initial state: zero levels, empty fire history, logs
+        and probe recordings. The weights are kept.
+        """
+        self.net.reset()
+        for probe in self.probes:
+            probe.clear()
+        self.actions.fill(MIN_LENGTH)
 
-            snn_parameters[snn_idx] = {
-                'hidden_layers': layer_weights,
-                'output_layer': output_params
-            }
+    def load_genome(self, cmaes_out):
+        """
+        Prepares the controller to evaluate a new genome, reusing all its arrays.
 
-        for snn_id, params in snn_parameters.items():
-            self.snns[snn_id].set_weights(params)
+        Parameters:
+            cmaes_out (ndarray): Flat CMA-ES genome, see `set_snn_weights()`.
+        """
+        self.reset()
+        self.set_snn_weights(cmaes_out)
 
-    def _get_output_state(self, inputs):
+    def get_output_state(self, inputs):
         """
-        Run SNN with distances from each actuator to corners of robot.
+        Steps every SNN like `get_lengths()`, but returns a nested dict describing each
+        SNN's output. Slower than `get_lengths()`, meant for debugging.
         
         Args:
             inputs (list): A list of tuples of the distances to the top left point mass and bottom right point mass
                            for each actuator in the robot.
             
         Returns:
-            dict: Contains 'continuous_actions' and 'duty_cycles' for each SNN.
+            dict: Contains 'target_length', 'outputs' and 'levels' for each SNN.
         """
 
-        outputs = {}
-        for snn_id, snn in enumerate(self.snns):
-
-            spikes, levels = snn.compute(inputs[snn_id])
-
-            actions = [1.6 if spikes[0] == 1 else 0.6]
+        spikes, levels = self.net.compute(inputs)
 
+        outputs = {}
+        for snn_id in range(self.num_snn):
             outputs[snn_id] = {
-                "target_length": actions,
-                "outputs": spikes[0],
-                "levels": levels,
+                "target_length":
+                [MAX_LENGTH if spikes[snn_id][0] == 1 else MIN_LENGTH],
+                "outputs": spikes[snn_id][0],
+                "levels": levels[snn_id].tolist(),
             }
 
         return outputs
 
     def get_lengths(self, inputs):
         """
-        Returns a list of target lengths (action array).
+        Steps every SNN and returns the target length of each actuator (action array).
 
         Args:
-            inputs (list): A list of tuples of the distances to the top left point mass and bottom right point mass
-                           for each actuator in the robot.
+            inputs (ndarray): Array shaped (num_snn, inp_size) holding the inputs into
+                              each actuator's SNN, e.g. the distances to the top left
+                              point mass and bottom right point mass.
 
         Returns:
-            list: Target length for each actuator, the "action array".
+            ndarray: Target length for each actuator, the "action array". The same
+                     array is reused, and overwritten, on every call.
         """
 
-        out = self._get_output_state(inputs)
+        spikes, _ = self.net.compute(inputs)
+
+        self.actions.fill(MIN_LENGTH)
+        self.actions[spikes[:, 0] == 1] = MAX_LENGTH
 
-        lengths = []
+        return self.actions
 
-        for _, item in out.items():
-            lengths.append(item['target_length'])
+    def add_probe(self, probe):
+        """
+        Attaches a probe, which records chosen neurons of chosen SNNs on every step.
+        Probes are cleared by `reset()`.
+
+        Parameters:
+            probe (snn.probes.Probe): The probe to attach. A
+                                      `snn.spike_stats.SpikeStats` works too.
+        """
+        probe.attach(self.net)
+        self.probes.append(probe)
 
-        return lengths
+    def remove_probe(self, probe):
+        """
+        Detaches a probe added with `add_probe()`.
+
+        Parameters:
+            probe (snn.probes.Probe): The probe to detach.
+        """
+        probe.detach()
+        self.probes.remove(probe)
 
-    def generate_output_csv(self, log_filename):
+    def run(self, input_sequence):
+        """
+        Runs every SNN open-loop over a recorded sequence of inputs, e.g. to replay
+        sensor traces for analysis or regression tests. Logs and probes record the
+        run like they would when calling `get_lengths()` on every step.
+
+        Parameters:
+            input_sequence (ndarray): Inputs shaped (steps, num_snn, inp_size).
+
+        Returns:
+            tuple: (spikes, levels) of the output layers, both shaped
+                   (steps, num_snn, output_size).
+        """
+        return self.net.run(input_sequence)
+
+    def generate_output_csv(self, log_filename, probe=None, chunk_rows=None):
         """
         Generates an output csv log file for activation level, firelog, and firing frequency for
         each neuron in each SNN.
+
+        Parameters:
+            log_filename (str): Name of the csv file in cmaes_framework/data/logs.
+            probe (snn.probes.Probe): If given, only log what this probe recorded.
+            chunk_rows (int): If given, write the file this many rows at a time
+                              instead of building the whole table in memory.
         """
 
-        # Get logs
-        fire_logs = self.get_fire_log()
-        level_logs = self.get_levels_log()
-        duty_cycle_logs = self.get_duty_cycle_log()
-
-        # Find how many time steps there were
-        steps = len(fire_logs[0]['output'][0])
-
-        # Generate SNN_log csv file
-        csv_header = ['SNN', "layer", 'neuron', 'log']
-        csv_header.extend([f"step{i}" for i in range(steps)])
-
-        df = pd.DataFrame(columns=csv_header)
-
-        # Iterate through logs to generate csv
-        for snn_id, snn in fire_logs.items():
-            for layer_name, layer in snn.items():
-                for neuron_id, fire_log_data in enumerate(layer):
-                    # Make levels log row
-                    level_log_data = level_logs[snn_id][layer_name][neuron_id]
-                    level_log_row = [
-                        str(snn_id),
-                        str(layer_name),
-                        str(neuron_id), "levellog"
-                    ]
-                    level_log_row.extend(level_log_data)
-                    df.loc[len(df)] = level_log_row
-
-                    # Make fire log row
-                    fire_log_row = [
-                        str(snn_id),
-                        str(layer_name),
-                        str(neuron_id), "firelog"
-                    ]
-                    fire_log_row.extend(fire_log_data)
-                    df.loc[len(df)] = fire_log_row
-
-                    # Make duty cycle log row
-                    duty_cycle_data = duty_cycle_logs[snn_id][layer_name][
-                        neuron_id]
-                    duty_cycle_row = [
-                        str(snn_id),
-                        str(layer_name),
-                        str(neuron_id), "dutycyclelog"
-                    ]
-                    duty_cycle_row.extend(duty_cycle_data)
-                    df.loc[len(df)] = duty_cycle_row
+        # Get logs as one array with a row per neuron and log
+        targets, values, log_names, steps = self._gather_logs(probe)
+        rows = [(*target, log_name) for target in targets
+                for log_name in log_names]
+        values = values.reshape(len(rows), len(steps))
 
         # Generate file
+        csv_path = self._log_path(log_filename)
+
+        if chunk_rows is None:
+            chunk_rows = max(len(rows), 1)
+        for first_row in range(0, max(len(rows), 1), chunk_rows):
+            chunk = slice(first_row, first_row + chunk_rows)
+            df = log_frame(rows[chunk], values[chunk], steps)
+            df.to_csv(csv_path,
+                      index=False,
+                      mode='w' if first_row == 0 else 'a',
+                      header=first_row == 0)
+
+        _link_latest(csv_path, "latest_log.csv")
+
+    def generate_output_log(self, log_filename, probe=None):
+        """
+        Generates a binary log file, see `snn.snn_log`, for activation level, firelog,
+        and firing frequency for each neuron in each SNN. Read it with
+        `snn.snn_log.SNNLog`.
+
+        Parameters:
+            log_filename (str): Name of the log file in cmaes_framework/data/logs,
+                                ending in `LOG_FILE_SUFFIX`.
+            probe (snn.probes.Probe): If given, only log what this probe recorded.
+        """
+        targets, values, log_names, steps = self._gather_logs(probe)
+        if probe is None:
+            # Duty cycles of every step are computed from the fire log when read
+            log_names = [name for name in log_names if name != "dutycyclelog"]
+            values = values[:, :len(log_names)]
+        log_path = self._log_path(log_filename)
+        save_snn_log(log_path, targets, values, log_names, steps,
+                     self.net.layer_names)
+        _link_latest(log_path, "latest_log" + LOG_FILE_SUFFIX)
+
+    def stream_output_log(self,
+                          log_filename,
+                          max_steps,
+                          chunk_steps=DEFAULT_CHUNK_STEPS):
+        """
+        Starts streaming the logs of every neuron in each SNN to a binary log file,
+        see `snn.snn_log`, as the controller runs. Only `chunk_steps` timesteps at a
+        time are kept in memory, so the controller can record nothing itself.
+
+        Parameters:
+            log_filename (str): Name of the log file in cmaes_framework/data/logs,
+                                ending in `LOG_FILE_SUFFIX`.
+            max_steps (int): Most timesteps that will be logged.
+            chunk_steps (int): How many timesteps to buffer between writes.
+
+        Returns:
+            snn.log_stream.LogStream: The stream. Call its `close()` after the
+                                      rollout to finish the file.
+        """
+        log_path = self._log_path(log_filename)
+        stream = LogStream(log_path, max_steps, chunk_steps)
+        stream.attach(self.net)
+        _link_latest(log_path, "latest_log" + LOG_FILE_SUFFIX)
+        return stream
+
+    def _gather_logs(self, probe=None):
+        """
+        Gathers the logs to write to a log file.
+
+        Parameters:
+            probe (snn.probes.Probe): If given, only gather what this probe recorded.
+
+        Returns:
+            tuple: (targets, values, log_names, steps). `values` is shaped
+                   (len(targets), len(log_names), len(steps)), see `get_log_table()`.
+        """
+        if probe is None:
+            targets, values = self.get_log_table()
+            return targets, values, LOG_NAMES, np.arange(values.shape[2])
+
+        log_names = [
+            name for name in LOG_NAMES if LOG_SIGNALS[name] in probe.signals
+        ]
+        targets, values = probe.get_table(
+            [LOG_SIGNALS[name] for name in log_names])
+        return targets, values, log_names, probe.get_steps()
+
+    def _log_path(self, log_filename):
+        """
+        Finds where to write a log file, creating the logs folder if needed.
+
+        Parameters:
+            log_filename (str): Name of the file in cmaes_framework/data/logs.
+
+        Returns:
+            str: Path of the log file.
+        """
         data_folder = Path(
             os.path.join(_project_root, "cmaes_framework", "data", "logs"))
         Path(data_folder).mkdir(parents=True, exist_ok=True)
-        csv_path = os.path.join(data_folder, log_filename)
-
-        df.to_csv(csv_path, index=False)
+        return os.path.join(data_folder, log_filename)
 
-        link = (os.path.join(_project_root, "cmaes_framework", "data",
-                             "latest_log.csv"))
+    def get_log_table(self):
+        """
+        Gathers the full logs of every neuron into one array, for bulk export.
 
-        # Set up latest.csv symlink
-        if os.path.exists(link):
-            os.remove(link)
+        Returns:
+            tuple: (targets, values). `targets` lists the (snn_id, layer, neuron) of
+                   every neuron, ordered by SNN, layer, then neuron. `values` is a
+                   float array shaped (len(targets), len(LOG_NAMES), steps). There
+                   are no steps unless the controller records full logs.
+        """
+        layers = self.net.layers
+        layer_log = layers[0].log
+        steps = layer_log.steps if layer_log is not None else 0
+
+        targets = [(snn_id, layer_name, neuron)
+                   for snn_id in range(self.num_snn)
+                   for layer_name, layer in zip(self.net.layer_names, layers)
+                   for neuron in range(layer.num_nodes)]
+
+        values = np.empty((self.num_snn, sum(layer.num_nodes for layer in layers),
+                           len(LOG_NAMES), steps))
+        first_node = 0
+        for layer in layers:
+            block = values[:, first_node:first_node + layer.num_nodes]
+            if steps:
+                logs = (layer.log.get_levels(), layer.log.get_fires(),
+                        layer.log.get_duty_cycles())
+                for i, log in enumerate(logs):
+                    # (steps, num_snn, num_nodes) -> (num_snn, num_nodes, steps)
+                    block[:, :, i] = np.moveaxis(log, 0, -1)
+            first_node += layer.num_nodes
+
+        return targets, values.reshape(len(targets), len(LOG_NAMES), steps)
+
+    def _layer_logs(self, layer_logs):
+        """
+        Splits batched per-layer logs into a dictionary with one entry per SNN.
 
-        if is_windows():
-            os.symlink(csv_path, link)
-        else:
-            try:
-                os.unlink(link)
-            except FileNotFoundError:
-                pass
-            os.system("ln -s " + csv_path + " " + link)
+        Parameters:
+            layer_logs (list): For each layer in `self.net.layers`, a log indexed by
+                               [snn][neuron][step].
 
-    def get_fire_log(self):
-        """
-        Return a dictionary with the firelog for each node in the hidden and output
-        layers of each SNN in the controller.
-        
         Returns:
             dict: Dictionary with structure:
                     {snn_id: {'hidden0': [...], 'hidden1': [...], ..., 'output': [...]}}
         """
+        *hidden_logs, output_log = layer_logs
         return {
             i: {
                 **{
-                    f'hidden{j}': [node.fire_log for node in layer.nodes]
-                    for j, layer in enumerate(snn.hidden_layers)
+                    f'hidden{j}': hidden_log[i]
+                    for j, hidden_log in enumerate(hidden_logs)
                 },
-                'output': [node.fire_log for node in snn.output_layer.nodes]
+                'output': output_log[i]
             }
-            for i, snn in enumerate(self.snns)
+            for i in range(self.num_snn)
         }
 
+    def get_fire_log(self):
+        """
+        Return a dictionary with the firelog for each node in the hidden and output
+        layers of each SNN in the controller.
+        
+        Returns:
+            dict: Dictionary with structure:
+                    {snn_id: {'hidden0': [...], 'hidden1': [...], ..., 'output': [...]}}
+        """
+        return self._layer_logs(
+            [layer.get_fire_log() for layer in self.net.layers])
+
     def get_levels_log(self):
         """
         Return a dictionary with the membrane potential levels 
@@ -323,16 +473,20 @@ class SNNController:
                     {snn_id: {'hidden0': [levels_log_node_1, levels_log_node_2, ...], 
                     'hidden1': [...], ..., 'output': [levels_log_node_1, levels_log_node_2, ...]}}
         """
-        return {
-            i: {
-                **{
-                    f'hidden{j}': [node.get_levels_log() for node in layer.nodes]
-                    for j, layer in enumerate(snn.hidden_layers)
-                },
-                'output': [node.get_levels_log() for node in snn.output_layer.nodes]
-            }
-            for i, snn in enumerate(self.snns)
-        }
+        return self._layer_logs(
+            [layer.get_levels_log() for layer in self.net.layers])
+
+    def get_spike_counts(self):
+        """
+        Return a dictionary with how many times each node in the hidden and output
+        layers of each SNN fired. Recorded unless the recording level is "off".
+
+        Returns:
+            dict: Dictionary with structure:
+                    {snn_id: {'hidden0': [spike_count_node_1, ...], ..., 'output': [...]}}
+        """
+        return self._layer_logs(
+            [layer.spike_counts.tolist() for layer in self.net.layers])
 
     def get_duty_cycle_log(self):
         """
@@ -345,17 +499,30 @@ class SNNController:
                     {snn_id: {'hidden0': [duty_cycle_node_1, duty_cycle_node_2, ...], 
                     'hidden1': [...], ..., 'output': [duty_cycle_node_1, duty_cycle_node_2, ...]}}
         """
-        return {
-            i: {
-                **{
-                    f'hidden{j}': [node.get_duty_cycle_log() for node in layer.nodes]
-                    for j, layer in enumerate(snn.hidden_layers)
-                },
-                'output': [node.get_duty_cycle_log() for node in snn.output_layer.nodes]
-            }
-            for i, snn in enumerate(self.snns)
-        }
-      
+        return self._layer_logs(
+            [layer.get_duty_cycle_log() for layer in self.net.layers])
+
+
+def _link_latest(path, link_name):
+    """
+    Points a symlink in cmaes_framework/data at the newest log file.
+
+    Parameters:
+        path (str): The log file.
+        link_name (str): Name of the symlink, e.g. "latest_log.csv".
+    """
+    link = (os.path.join(_project_root, "cmaes_framework", "data", link_name))
+
+    # Set up latest symlink
+    if os.path.lexists(link):
+        os.remove(link)
+
+    if is_windows():
+        os.symlink(path, link)
+    else:
+        os.system("ln -s " + path + " " + link)
+
+
 def compute_genome_size(robot_path, snn_input_method, hidden_sizes):
     """
     Given a robot body file an SNN input method, and hidden layer sizes, 
@@ -364,43 +531,99 @@ def compute_genome_size(robot_path, snn_input_method, hidden_sizes):
     Parameters:
         robot_path (str): Path to robot JSON configuration file.
         snn_input_method (str): How SNN inputs are computed. 
-                        Options are ["corners", "neighbors"]
+                        Options are ["corners", "all_dist"]
         hidden_sizes (list): A list of the sizes of all the hidden layers.
 
     Returns:
         tuple: (num_actuators (int), genome_length (int)).
     """
 
-    if not os.path.exists(robot_path):
-        raise FileNotFoundError(
-            f"Robot configuration file not found: {robot_path}")
-    with open(robot_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    layout = get_genome_layout(robot_path, snn_input_method, hidden_sizes)
 
-    # Extract robot data
-    robot_key = list(data["objects"].keys())[0]
-    robot_data = data["objects"][robot_key]
+    return layout.num_snn, layout.genome_length
 
-    # Count actuators (types 3 and 4)
-    num_snn = sum(1 for t in robot_data["types"] if t in [3, 4])
 
-    if snn_input_method == "corners":
-        inp_size = 2  # Inputs are distances to two corners
-    elif snn_input_method == "all_dist":
-        inp_size = num_snn - 1  # Inputs are distances to all other actuators
-
-    # Compute parameters for each SNN
-    params_per_snn = 0
-    layer_input_size = inp_size
-
-    # Sum hidden layers
-    for hidden_size in hidden_sizes:
-        params_per_snn += (layer_input_size + 1) * hidden_size
-        layer_input_size = hidden_size
-
-    # Output layer
-    params_per_snn += (layer_input_size + 1)
+def compare_precision(genome,
+                      input_sequence,
+                      inp_size,
+                      hidden_sizes,
+                      output_size=1,
+                      robot_config=ROBOT_DATA_PATH,
+                      spike_decay=SPIKE_DECAY_DEFAULT,
+                      dtype=np.float32):
+    """
+    Runs a genome open-loop on the same inputs in float64 and in `dtype`, and reports
+    how far the spike timing of the two runs diverges.
 
-    genome_length = num_snn * params_per_snn
+    Parameters:
+        genome (ndarray): Flat CMA-ES genome.
+        input_sequence (ndarray): SNN inputs for every step, shaped
+                                  (steps, num_snn, inp_size).
+        inp_size (int): Number of inputs for each SNN.
+        hidden_sizes (list): List of numbers of nodes in hidden layers.
+        output_size (int): Number of outputs.
+        robot_config (str): A robot's .json file.
+        spike_decay (float): Spike decay rate for neurons.
+        dtype: Float type to compare against float64.
 
-    return num_snn, genome_length
+    Returns:
+        dict: 'mismatched_spikes' (number of neuron steps whose fire differs),
+              'mismatch_rate' (that number over all neuron steps),
+              'first_divergence_step' (first step with a differing fire, or None),
+              'max_level_error' (largest level difference before the first divergence)
+              and 'per_layer' (mismatched spikes for each layer name).
+    """
+    input_sequence = np.asarray(input_sequence)
+    steps = len(input_sequence)
+
+    controllers = [
+        SNNController(inp_size,
+                      hidden_sizes,
+                      output_size,
+                      robot_config,
+                      spike_decay,
+                      record=RECORD_FULL,
+                      max_steps=steps,
+                      dtype=controller_dtype)
+        for controller_dtype in (np.float64, dtype)
+    ]
+
+    for controller in controllers:
+        controller.set_snn_weights(genome)
+        controller.run(input_sequence)
+
+    reference, candidate = [controller.net for controller in controllers]
+
+    per_layer = {}
+    first_divergence_step = None
+    total_neuron_steps = 0
+
+    for name, ref_layer, cand_layer in zip(reference.layer_names,
+                                           reference.layers, candidate.layers):
+        differs = ref_layer.log.get_fires() != cand_layer.log.get_fires()
+        per_layer[name] = int(differs.sum())
+        total_neuron_steps += differs.size
+
+        diverged_steps = np.flatnonzero(differs.reshape(steps, -1).any(axis=1))
+        if diverged_steps.size and (first_divergence_step is None or
+                                    diverged_steps[0] < first_divergence_step):
+            first_divergence_step = int(diverged_steps[0])
+
+    # Once one spike differs, the levels downstream of it are no longer comparable
+    until = steps if first_divergence_step is None else first_divergence_step
+    max_level_error = 0.0
+    for ref_layer, cand_layer in zip(reference.layers, candidate.layers):
+        if until:
+            error = np.abs(ref_layer.log.get_levels()[:until] -
+                           cand_layer.log.get_levels()[:until].astype(np.float64))
+            max_level_error = max(max_level_error, float(error.max()))
+
+    mismatched_spikes = sum(per_layer.values())
+
+    return {
+        'mismatched_spikes': mismatched_spikes,
+        'mismatch_rate': mismatched_spikes / max(total_neuron_steps, 1),
+        'first_divergence_step': first_divergence_step,
+        'max_level_error': max_level_error,
+        'per_layer': per_layer
+    }
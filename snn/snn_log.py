@@ -0,0 +1,402 @@
+"""
+Module for binary SNN log files, a faster and smaller alternative to CSV logs.
+
+A log file is a directory holding a JSON header and one .npy array per log, each
+indexed by [snn, layer, neuron, step]. Layers are padded to the size of the
+biggest layer, `recorded` marks which neurons hold data. Fire logs are bit-packed
+along the step axis (see `snn.spikes`), and duty cycles are computed from them
+when a log of every step doesn't store its own.
+"""
+
+from functools import lru_cache
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from snn.model_struct import MAX_FIRELOG_SIZE
+from snn.spikes import (packed_length, pack_spikes, unpack_spikes, spike_times,
+                        duty_cycles)
+
+LOG_FILE_SUFFIX = ".snnlog"
+LOG_FILE_VERSION = 2
+READABLE_VERSIONS = (1, 2)  # Version 1 stored fire logs as one int8 per step
+HEADER_FILENAME = "header.json"
+
+# Names of the logs in SNN log files
+LOG_NAMES = ("levellog", "firelog", "dutycyclelog")
+CSV_LABEL_COLUMNS = ['SNN', "layer", 'neuron', 'log']
+LOG_DTYPES = {
+    "levellog": np.float64,
+    "firelog": np.uint8,
+    "dutycyclelog": np.float64
+}
+PACKED_LOGS = ("firelog",)
+DEFAULT_CACHE_SIZE = 256  # Logs of single neurons kept by readers for repeated use
+
+
+def save_snn_log(path, targets, values, log_names, steps, layer_names):
+    """
+    Writes a binary SNN log file.
+
+    Parameters:
+        path (str): Directory to write, conventionally ending in `LOG_FILE_SUFFIX`.
+        targets (list): (snn_id, layer, neuron) of each logged neuron.
+        values (ndarray): Logged values shaped (len(targets), len(log_names), steps).
+        log_names (list): Which of `LOG_NAMES` are logged, in the order of `values`.
+        steps (ndarray): Step number of each logged sample.
+        layer_names (list): Names of the SNN's layers, in order.
+    """
+    snn_ids = sorted({snn_id for snn_id, _, _ in targets})
+    layer_sizes = [
+        1 + max([neuron for _, name, neuron in targets if name == layer_name],
+                default=-1) for layer_name in layer_names
+    ]
+    shape = (len(snn_ids), len(layer_names), max(layer_sizes, default=0))
+
+    # Where each target goes in the [snn, layer, neuron] grid
+    if targets:
+        snn_index, layer_index, neuron_index = np.array(
+            [(snn_ids.index(snn_id), layer_names.index(layer_name), neuron)
+             for snn_id, layer_name, neuron in targets]).T
+    else:
+        snn_index = layer_index = neuron_index = np.zeros(0, dtype=int)
+
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+    recorded = np.zeros(shape, dtype=bool)
+    recorded[snn_index, layer_index, neuron_index] = True
+
+    for log_name in LOG_NAMES:
+        log_path = os.path.join(path, log_name + ".npy")
+        if log_name in log_names:
+            log_values = values[:, log_names.index(log_name)]
+            log_length = len(steps)
+            if log_name in PACKED_LOGS:
+                log_values = pack_spikes(log_values)
+                log_length = packed_length(len(steps))
+            log = np.zeros((*shape, log_length), dtype=LOG_DTYPES[log_name])
+            log[snn_index, layer_index, neuron_index] = log_values
+            np.save(log_path, log)
+        elif os.path.exists(log_path):
+            # Left over from an older log written to the same path
+            os.remove(log_path)
+
+    write_snn_log_header(path, snn_ids, layer_names, layer_sizes, log_names,
+                         steps, recorded)
+
+
+def write_snn_log_header(path, snn_ids, layer_names, layer_sizes, log_names,
+                         steps, recorded):
+    """
+    Writes the header of a binary SNN log file, along with the logged step numbers
+    and which neurons were recorded. The log arrays are written separately.
+
+    Parameters:
+        path (str): Directory of the log file.
+        snn_ids (list): ID of each SNN in the log, in order.
+        layer_names (list): Names of the SNN's layers, in order.
+        layer_sizes (list): Number of logged neurons in each layer.
+        log_names (list): Which of `LOG_NAMES` are logged.
+        steps (ndarray): Step number of each logged sample.
+        recorded (ndarray): Whether each [snn, layer, neuron] was logged.
+    """
+    np.save(os.path.join(path, "recorded.npy"), recorded)
+    np.save(os.path.join(path, "steps.npy"), np.asarray(steps, dtype=np.int64))
+
+    header = {
+        "version": LOG_FILE_VERSION,
+        "snn_ids": [int(snn_id) for snn_id in snn_ids],
+        "layers": list(layer_names),
+        "layer_sizes": [int(size) for size in layer_sizes],
+        "logs": list(log_names),
+        "packed": [name for name in log_names if name in PACKED_LOGS],
+        "num_steps": len(steps)
+    }
+    with open(os.path.join(path, HEADER_FILENAME), "w") as header_file:
+        json.dump(header, header_file, indent=4)
+
+
+def log_frame(rows, values, steps):
+    """
+    Builds the table written to CSV logs in one go.
+
+    Parameters:
+        rows (list): (snn_id, layer, neuron, log) of each row.
+        values (ndarray): Logged values shaped (len(rows), len(steps)).
+        steps (ndarray): Step number of each logged sample.
+
+    Returns:
+        pd.DataFrame: One row per neuron and log with columns
+                      SNN, layer, neuron, log, step{i}...
+    """
+    labels = pd.DataFrame([[str(label) for label in row] for row in rows],
+                          columns=CSV_LABEL_COLUMNS,
+                          dtype=object)
+    samples = pd.DataFrame(values, columns=[f"step{i}" for i in steps])
+    return pd.concat([labels, samples], axis=1)
+
+
+def is_snn_log(path):
+    """
+    Checks whether a path is a binary SNN log file.
+
+    Parameters:
+        path (str): Path to check.
+
+    Returns:
+        bool: True if `path` is a directory with an SNN log header.
+    """
+    return os.path.isfile(os.path.join(path, HEADER_FILENAME))
+
+
+class SNNLog:
+    """
+    Reads a binary SNN log file. Logs are memory-mapped, so only the parts that are
+    used get read from disk.
+    """
+
+    def __init__(self, path, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Opens an SNN log file.
+
+        Parameters:
+            path (str): Directory written by `save_snn_log()`.
+            cache_size (int): How many results of `get()` to keep, so plotting the
+                              same neurons again doesn't unpack or recompute them.
+        """
+        self.path = str(path)
+        with open(os.path.join(self.path, HEADER_FILENAME)) as header_file:
+            self.header = json.load(header_file)
+        if self.header["version"] not in READABLE_VERSIONS:
+            raise ValueError(
+                f"Unsupported SNN log version {self.header['version']}, "
+                f"expected one of {READABLE_VERSIONS}")
+
+        self.snn_ids = self.header["snn_ids"]
+        self.layer_names = self.header["layers"]
+        self.layer_sizes = self.header["layer_sizes"]
+        self.packed = self.header.get("packed", [])
+        self._snn_index = {snn_id: i for i, snn_id in enumerate(self.snn_ids)}
+        self._layer_index = {
+            layer: i for i, layer in enumerate(self.layer_names)
+        }
+
+        self.steps = np.load(os.path.join(self.path, "steps.npy"))
+        self.recorded = np.load(os.path.join(self.path, "recorded.npy"))
+
+        # Streamed logs are preallocated and may hold unused steps at the end
+        self.logs = {}
+        for log_name in self.header["logs"]:
+            log = np.load(os.path.join(self.path, log_name + ".npy"),
+                          mmap_mode="r")
+            if log_name in self.packed:
+                self.logs[log_name] = log[..., :packed_length(self.num_steps)]
+            else:
+                self.logs[log_name] = log[..., :self.num_steps]
+
+        # Duty cycles of a log of every step can be computed from its fires
+        self.derive_duty_cycles = ("dutycyclelog" not in self.logs and
+                                   "firelog" in self.packed and
+                                   np.array_equal(self.steps,
+                                                  np.arange(self.num_steps)))
+        self.log_names = [
+            log_name for log_name in LOG_NAMES
+            if log_name in self.logs or
+            (log_name == "dutycyclelog" and self.derive_duty_cycles)
+        ]
+        self._cached_get = lru_cache(maxsize=cache_size)(self._get)
+
+    @property
+    def num_steps(self):
+        """Number of logged samples per neuron."""
+        return len(self.steps)
+
+    def _index(self, snn_id, layer):
+        """
+        Finds the position of an SNN and a layer in the log arrays.
+
+        Parameters:
+            snn_id (int): ID of the SNN.
+            layer (str): Name of the layer, e.g. 'hidden0' or 'output'.
+
+        Returns:
+            tuple: (snn index, layer index).
+        """
+        if snn_id not in self._snn_index:
+            raise KeyError(f"SNN {snn_id} is not in the log")
+        if layer not in self._layer_index:
+            raise KeyError(f"Layer {layer} is not in the log")
+        return self._snn_index[snn_id], self._layer_index[layer]
+
+    def get(self, log_name, snn_id=None, layer=None, neuron=None):
+        """
+        Returns part of a log. Stored logs are returned as views of the memory-mapped
+        file, fire logs are unpacked and derived duty cycles computed into new arrays.
+
+        Parameters:
+            log_name (str): One of the logged `LOG_NAMES`.
+            snn_id (int): ID of the SNN, or None for all of them.
+            layer (str): Name of the layer, or None for all of them. Needs `snn_id`.
+            neuron (int): Index of the neuron, or None for the whole layer. Needs
+                          `layer`.
+
+        Returns:
+            ndarray: Read-only array indexed by whichever of [snn, layer, neuron,
+                     step] weren't given. Repeated calls return the cached array.
+        """
+        return self._cached_get(log_name, snn_id, layer, neuron)
+
+    def _get(self, log_name, snn_id, layer, neuron):
+        """
+        Reads part of a log, see `get()`.
+
+        Returns:
+            ndarray: Read-only array.
+        """
+        log = self._read(log_name, snn_id, layer, neuron)
+        log.flags.writeable = False
+        return log
+
+    def _read(self, log_name, snn_id, layer, neuron):
+        """
+        Reads part of a log, see `get()`.
+
+        Returns:
+            ndarray: View of the file or a new array.
+        """
+        if log_name == "dutycyclelog" and self.derive_duty_cycles:
+            return duty_cycles(self.get_packed("firelog", snn_id, layer, neuron),
+                               self.num_steps, MAX_FIRELOG_SIZE)
+        log = self._select(self.logs[log_name], snn_id, layer, neuron)
+        if log_name in self.packed:
+            return unpack_spikes(log, self.num_steps)
+        return log
+
+    def get_packed(self, log_name, snn_id=None, layer=None, neuron=None):
+        """
+        Returns part of a bit-packed log, like the fire log, without unpacking it.
+
+        Parameters:
+            log_name (str): One of the packed logs.
+            snn_id (int): ID of the SNN, or None for all of them.
+            layer (str): Name of the layer, or None for all of them. Needs `snn_id`.
+            neuron (int): Index of the neuron, or None for the whole layer. Needs
+                          `layer`.
+
+        Returns:
+            ndarray: Read-only view of packed bytes, indexed by whichever of
+                     [snn, layer, neuron] weren't given and then the packed steps.
+        """
+        if log_name not in self.packed:
+            raise KeyError(f"Log {log_name} is not bit-packed")
+        return self._select(self.logs[log_name], snn_id, layer, neuron)
+
+    def spike_times(self, snn_id, layer, neuron):
+        """
+        Finds the logged samples on which a neuron fired.
+
+        Parameters:
+            snn_id (int): ID of the SNN.
+            layer (str): Name of the layer.
+            neuron (int): Index of the neuron.
+
+        Returns:
+            ndarray: Indices of the samples with a spike. Samples are timesteps unless
+                     the log was decimated, see `steps`.
+        """
+        if "firelog" not in self.packed:
+            return np.flatnonzero(self.get("firelog", snn_id, layer, neuron))
+        return spike_times(self.get_packed("firelog", snn_id, layer, neuron),
+                           self.num_steps)
+
+    def _select(self, log, snn_id, layer, neuron):
+        """
+        Indexes a log array by SNN, layer and neuron.
+
+        Parameters:
+            log (ndarray): A log array indexed by [snn, layer, neuron, ...].
+            snn_id (int): ID of the SNN, or None for all of them.
+            layer (str): Name of the layer, or None for all of them.
+            neuron (int): Index of the neuron, or None for the whole layer.
+
+        Returns:
+            ndarray: View of `log`.
+        """
+        if snn_id is None:
+            return log
+        if layer is None:
+            if snn_id not in self._snn_index:
+                raise KeyError(f"SNN {snn_id} is not in the log")
+            return log[self._snn_index[snn_id]]
+        snn_index, layer_index = self._index(snn_id, layer)
+        if neuron is None:
+            return log[snn_index, layer_index, :self.layer_sizes[layer_index]]
+        return log[snn_index, layer_index, neuron]
+
+    def has(self, log_name, snn_id, layer, neuron):
+        """
+        Checks whether a neuron's log holds data.
+
+        Parameters:
+            log_name (str): Name of the log.
+            snn_id (int): ID of the SNN.
+            layer (str): Name of the layer.
+            neuron (int): Index of the neuron.
+
+        Returns:
+            bool: True if the neuron was logged.
+        """
+        if (log_name not in self.log_names or snn_id not in self._snn_index or
+                layer not in self._layer_index):
+            return False
+        snn_index, layer_index = self._index(snn_id, layer)
+        return (neuron < self.recorded.shape[2] and
+                bool(self.recorded[snn_index, layer_index, neuron]))
+
+    def neurons(self, snn_id=None):
+        """
+        Lists the logged neurons.
+
+        Parameters:
+            snn_id (int): Only list the neurons of this SNN, or None for all SNNs.
+
+        Returns:
+            list: (snn_id, layer, neuron) of each logged neuron, ordered by SNN,
+                  layer, then neuron.
+        """
+        if snn_id is not None:
+            return [(snn_id, self.layer_names[layer_index], int(neuron))
+                    for layer_index, neuron in np.argwhere(
+                        self.recorded[self._snn_index[snn_id]])]
+        return [(self.snn_ids[snn_index], self.layer_names[layer_index],
+                 int(neuron))
+                for snn_index, layer_index, neuron in np.argwhere(self.recorded)]
+
+    def to_dataframe(self):
+        """
+        Converts the log to the table written to CSV logs.
+
+        Returns:
+            pd.DataFrame: One row per neuron and log with columns
+                          SNN, layer, neuron, log, step{i}...
+        """
+        rows = [(snn_id, layer, neuron, log_name)
+                for snn_id, layer, neuron in self.neurons()
+                for log_name in self.log_names]
+        index = np.nonzero(self.recorded)
+        values = np.stack([
+            self.get(log_name)[index].astype(np.float64)
+            for log_name in self.log_names
+        ], axis=1).reshape(len(rows), self.num_steps)
+
+        return log_frame(rows, values, self.steps)
+
+    def to_csv(self, csv_path):
+        """
+        Converts the log to a CSV log file, readable by `exp_plots/plots.py`.
+
+        Parameters:
+            csv_path (str): Where to write the CSV file.
+        """
+        self.to_dataframe().to_csv(csv_path, index=False)
@@ -0,0 +1,265 @@
+"""
+Module for summary statistics of SNN activity, accumulated online as the SNN runs
+instead of being computed from full logs afterwards.
+"""
+
+import numpy as np
+from snn.model_struct import MAX_FIRELOG_SIZE
+
+DEFAULT_ISI_BINS = 50  # Inter-spike intervals of 1 to 49 steps, and 50 or more
+DUTY_CYCLE_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_CHUNK_STEPS = 256  # Timesteps buffered before they are added to the statistics
+
+
+class SpikeStats:
+    """
+    Keeps running statistics of every neuron of an SNN: spike counts, inter-spike
+    interval histograms, activation level min/max/mean and duty cycle percentiles.
+    Memory doesn't grow with the number of steps.
+
+    Each step is only copied into a small buffer, and every `chunk_steps` steps the
+    buffer is added to the statistics with a few array operations. Duty cycles are
+    binned straight from the layers' integer fire counts.
+    """
+
+    def __init__(self,
+                 isi_bins=DEFAULT_ISI_BINS,
+                 percentiles=DUTY_CYCLE_PERCENTILES,
+                 chunk_steps=DEFAULT_CHUNK_STEPS):
+        """
+        Initializes a SpikeStats.
+
+        Parameters:
+            isi_bins (int): Number of inter-spike interval histogram bins. Bin i counts
+                            intervals of i + 1 steps, the last bin also counts longer
+                            intervals.
+            percentiles (tuple): Duty cycle percentiles to report, from 0 to 100.
+            chunk_steps (int): How many steps to buffer before adding them to the
+                               statistics.
+        """
+        if isi_bins < 1:
+            raise ValueError("Inter-spike interval histograms need a bin.")
+        if chunk_steps < 1:
+            raise ValueError("Spike statistics need chunks of at least one step.")
+        self.isi_bins = isi_bins
+        self.chunk_steps = chunk_steps
+        self.percentiles = tuple(percentiles)
+        self.layer_stats = []
+
+    def attach(self, net):
+        """
+        Hooks the statistics into every layer of `net`.
+
+        Parameters:
+            net (SpikyNet): A vectorized SpikyNet, like `SNNController.net`.
+        """
+        if not net.vectorized:
+            raise ValueError("Spike statistics need a vectorized SpikyNet.")
+
+        self.detach()
+
+        for layer_name, layer in zip(net.layer_names, net.layers):
+            layer_stats = LayerStats(self, layer_name, layer.levels.shape)
+            layer.probes.append(layer_stats)
+            self.layer_stats.append((layer, layer_stats))
+
+    def detach(self):
+        """Unhooks the statistics from the layers they are attached to."""
+        for layer, layer_stats in self.layer_stats:
+            layer.probes.remove(layer_stats)
+        self.layer_stats = []
+
+    def clear(self):
+        """Forgets all accumulated statistics."""
+        for _, layer_stats in self.layer_stats:
+            layer_stats.clear()
+
+    def summary(self):
+        """
+        Returns the statistics of every layer.
+
+        Returns:
+            dict: {layer: {statistic: array}}. Arrays are shaped like the layer's
+                  state, e.g. (num_snn, num_nodes), with a trailing axis for
+                  "isi_histogram" (isi_bins) and "duty_cycle_percentiles"
+                  (len(percentiles)). See `LayerStats.summary()`.
+        """
+        return {
+            layer_stats.layer_name: layer_stats.summary()
+            for _, layer_stats in self.layer_stats
+        }
+
+
+class LayerStats:
+    """
+    The part of a SpikeStats that accumulates the statistics of one layer.
+    """
+
+    def __init__(self, stats, layer_name, layer_shape):
+        """
+        Initializes a LayerStats.
+
+        Parameters:
+            stats (SpikeStats): The statistics this belongs to.
+            layer_name (str): Name of the layer, e.g. 'hidden0' or 'output'.
+            layer_shape (tuple): Shape of the layer's state, (num_nodes,) or
+                                 (*batch_shape, num_nodes).
+        """
+        self.stats = stats
+        self.layer_name = layer_name
+        self.shape = tuple(layer_shape)
+        size = int(np.prod(self.shape))
+        chunk_steps = stats.chunk_steps
+
+        self.spike_counts = np.zeros(size, dtype=np.int64)
+        self.last_spike = np.zeros(size, dtype=np.int64)
+        self.isi_histogram = np.zeros((size, stats.isi_bins), dtype=np.int64)
+        self.level_min = np.zeros(size)
+        self.level_max = np.zeros(size)
+        # Duty cycles only take the values k / MAX_FIRELOG_SIZE, so a histogram
+        # over the fire count k gives exact percentiles
+        self.duty_cycle_histogram = np.zeros((size, MAX_FIRELOG_SIZE + 1),
+                                             dtype=np.int64)
+
+        # Steps not yet added to the statistics, shaped like the layer so recording
+        # is a plain copy. Row 0 of the level buffer holds the running level sum,
+        # so summing the rows adds the levels to it in step order.
+        self._steps = np.zeros(chunk_steps, dtype=np.int64)
+        self._level_rows = np.zeros((chunk_steps + 1, *self.shape))
+        self.level_sum = self._level_rows[0].reshape(-1)
+        self._fired = np.zeros((chunk_steps, *self.shape), dtype=bool)
+        self._fire_counts = np.zeros((chunk_steps, *self.shape),
+                                     dtype=np.int64)
+
+        self._isi_start = np.arange(size) * stats.isi_bins - 1
+        self._histogram_start = np.arange(size) * (MAX_FIRELOG_SIZE + 1)
+
+        self.clear()
+
+    def clear(self):
+        """Forgets all accumulated statistics."""
+        self.steps = 0
+        self.count = 0  # Number of buffered steps
+        self.spike_counts.fill(0)
+        self.last_spike.fill(-1)
+        self.isi_histogram.fill(0)
+        self.level_min.fill(np.inf)
+        self.level_max.fill(-np.inf)
+        self.level_sum.fill(0)
+        self.duty_cycle_histogram.fill(0)
+
+    def record(self, step, levels, fired, fire_counts):
+        """
+        Buffers one step of the layer's state, adding the buffer to the statistics
+        when it is full.
+
+        Parameters:
+            step (int): Timestep, counting from zero.
+            levels (ndarray): Activation level of every neuron in the layer.
+            fired (ndarray): Whether every neuron in the layer fired.
+            fire_counts (ndarray): Fires of every neuron in the layer in the last
+                                   `MAX_FIRELOG_SIZE` steps.
+        """
+        count = self.count
+        self._steps[count] = step
+        self._level_rows[count + 1] = levels
+        self._fired[count] = fired
+        self._fire_counts[count] = fire_counts
+        self.count += 1
+        self.steps += 1
+
+        if self.count == len(self._steps):
+            self.flush()
+
+    def flush(self):
+        """Adds the buffered steps to the statistics."""
+        count = self.count
+        if count == 0:
+            return
+        self.count = 0
+
+        level_rows = self._level_rows[:count + 1].reshape(count + 1, -1)
+        levels = level_rows[1:]
+        fired = self._fired[:count].reshape(count, -1)
+        np.minimum(self.level_min, levels.min(axis=0), out=self.level_min)
+        np.maximum(self.level_max, levels.max(axis=0), out=self.level_max)
+        level_rows.sum(axis=0, out=self.level_sum)
+        self.spike_counts += fired.sum(axis=0)
+
+        # Spikes sorted by neuron, then step. Each spike ends an interval that
+        # started at the previous spike of its neuron, in this chunk or before.
+        neurons, rows = np.nonzero(fired.T)
+        if len(neurons):
+            times = self._steps[rows]
+            new_neuron = np.ones(len(neurons), dtype=bool)
+            new_neuron[1:] = neurons[1:] != neurons[:-1]
+            previous = np.empty_like(times)
+            previous[1:] = times[:-1]
+            previous[new_neuron] = self.last_spike[neurons[new_neuron]]
+
+            ended = previous >= 0
+            intervals = np.minimum(times[ended] - previous[ended],
+                                   self.stats.isi_bins)
+            self.isi_histogram.reshape(-1)[:] += np.bincount(
+                self._isi_start[neurons[ended]] + intervals,
+                minlength=self.isi_histogram.size)
+
+            last = np.append(new_neuron[1:], True)
+            self.last_spike[neurons[last]] = times[last]
+
+        self.duty_cycle_histogram.reshape(-1)[:] += np.bincount(
+            (self._histogram_start +
+             self._fire_counts[:count].reshape(count, -1)).reshape(-1),
+            minlength=self.duty_cycle_histogram.size)
+
+    def duty_cycle_percentiles(self):
+        """
+        Computes the duty cycle percentiles from the duty cycle histogram, the same as
+        `np.percentile(..., method="inverted_cdf")` over every step's duty cycle.
+
+        Returns:
+            ndarray: Percentiles shaped (neurons, len(percentiles)), NaN before the
+                     first step.
+        """
+        self.flush()
+        percentiles = np.full((len(self.spike_counts), len(self.stats.percentiles)),
+                              np.nan)
+        if self.steps == 0:
+            return percentiles
+
+        cumulative = np.cumsum(self.duty_cycle_histogram, axis=-1)
+        for i, percentile in enumerate(self.stats.percentiles):
+            rank = max(1, np.ceil(percentile / 100 * self.steps))
+            percentiles[:, i] = np.argmax(cumulative >= rank,
+                                          axis=-1) / MAX_FIRELOG_SIZE
+        return percentiles
+
+    def summary(self):
+        """
+        Returns the layer's statistics.
+
+        Returns:
+            dict: Arrays shaped like the layer's state:
+                  "steps": number of steps seen,
+                  "spike_count" and "firing_rate" (spikes per step),
+                  "isi_histogram" with a trailing axis of histogram bins,
+                  "level_min", "level_max" and "level_mean",
+                  "duty_cycle_percentiles" with a trailing axis of percentiles,
+                  "dead" (never fired) and "saturated" (fired on every step).
+        """
+        self.flush()
+        steps = max(self.steps, 1)
+        shape = self.shape
+        return {
+            "steps": self.steps,
+            "spike_count": self.spike_counts.reshape(shape).copy(),
+            "firing_rate": (self.spike_counts / steps).reshape(shape),
+            "isi_histogram": self.isi_histogram.reshape(*shape, -1).copy(),
+            "level_min": self.level_min.reshape(shape).copy(),
+            "level_max": self.level_max.reshape(shape).copy(),
+            "level_mean": (self.level_sum / steps).reshape(shape),
+            "duty_cycle_percentiles":
+                self.duty_cycle_percentiles().reshape(*shape, -1),
+            "dead": (self.spike_counts == 0).reshape(shape),
+            "saturated": (self.spike_counts == self.steps).reshape(shape)
+        }
@@ -0,0 +1,103 @@
+"""
+Module for spike trains stored bit-packed with `np.packbits`, 8 timesteps per byte,
+and vectorized helpers that read them without going through Python lists.
+"""
+
+import numpy as np
+
+# Number of set bits in every possible byte
+_BITS_SET = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None],
+                          axis=1).sum(axis=1)
+
+
+def packed_length(num_steps):
+    """
+    Returns how many bytes a packed spike train of `num_steps` timesteps takes.
+
+    Parameters:
+        num_steps (int): Number of timesteps.
+
+    Returns:
+        int: Number of bytes.
+    """
+    return (num_steps + 7) // 8
+
+
+def pack_spikes(spikes, axis=-1):
+    """
+    Packs spike trains into bits.
+
+    Parameters:
+        spikes (ndarray): Spikes, nonzero where a neuron fired.
+        axis (int): The time axis.
+
+    Returns:
+        ndarray: uint8 array with `packed_length(steps)` entries along `axis`. Bits
+                 past the last timestep are zero.
+    """
+    return np.packbits(np.not_equal(spikes, 0), axis=axis)
+
+
+def unpack_spikes(packed, num_steps, axis=-1):
+    """
+    Unpacks bit-packed spike trains.
+
+    Parameters:
+        packed (ndarray): Packed spikes from `pack_spikes()`.
+        num_steps (int): Number of timesteps in the trains.
+        axis (int): The time axis.
+
+    Returns:
+        ndarray: uint8 array with `num_steps` entries along `axis`, 1 where a
+                 neuron fired.
+    """
+    return np.unpackbits(packed, axis=axis, count=num_steps)
+
+
+def spike_times(packed, num_steps):
+    """
+    Finds the timesteps a neuron fired on.
+
+    Parameters:
+        packed (ndarray): One packed spike train.
+        num_steps (int): Number of timesteps in the train.
+
+    Returns:
+        ndarray: Sorted timesteps with a spike.
+    """
+    return np.flatnonzero(unpack_spikes(np.ravel(packed), num_steps))
+
+
+def count_spikes(packed, axis=-1):
+    """
+    Counts spikes without unpacking them.
+
+    Parameters:
+        packed (ndarray): Packed spikes from `pack_spikes()`.
+        axis (int): The time axis.
+
+    Returns:
+        ndarray: How many times each neuron fired.
+    """
+    return _BITS_SET[packed].sum(axis=axis)
+
+
+def duty_cycles(packed, num_steps, window, axis=-1):
+    """
+    Computes duty cycles from packed spikes: the fraction of the last `window`
+    timesteps on which each neuron fired, counting timesteps before the first as
+    silent, like `VectorSpikyLayer.duty_cycles()` at every step.
+
+    Parameters:
+        packed (ndarray): Packed spikes from `pack_spikes()`.
+        num_steps (int): Number of timesteps in the trains.
+        window (int): Number of timesteps per duty cycle.
+        axis (int): The time axis.
+
+    Returns:
+        ndarray: Float duty cycles with `num_steps` entries along `axis`.
+    """
+    spikes = np.moveaxis(unpack_spikes(packed, num_steps, axis), axis, -1)
+    fired = np.cumsum(spikes, axis=-1, dtype=np.int64)
+    fired[..., window:] -= fired[..., :-window].copy()
+    return np.moveaxis(fired / window, -1, axis)
@@ -0,0 +1,10 @@
+"""
+Makes the `snn` package and the `cmaes_framework` modules importable from the tests.
+"""
+
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'cmaes_framework'))
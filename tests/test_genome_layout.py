@@ -0,0 +1,34 @@
+"""
+Tests that SpikyNet lays out its parameters like `snn.genome_layout.GenomeLayout`.
+"""
+
+import numpy as np
+from snn.genome_layout import GenomeLayout
+from snn.model_struct import SpikyNet
+
+
+def test_net_parameters_follow_layout():
+    net = SpikyNet(3, [4, 2], 1, batch_shape=(5,))
+    layout = GenomeLayout(5, 3, [4, 2])
+
+    assert net.layout == layout
+    assert net.num_params == layout.params_per_snn
+    assert net.param_slices == [(layer.start, layer.end)
+                                for layer in layout.layers]
+
+    bias_positions = [
+        position for layer in layout.layers
+        for position in layer.bias_positions
+    ]
+    np.testing.assert_array_equal(np.flatnonzero(~net.weight_mask),
+                                  bias_positions)
+
+
+def test_biases_are_last_in_each_neuron():
+    net = SpikyNet(2, [3], 1)
+    params = np.arange(net.num_params, dtype=float)
+    net.set_flat_weights(params)
+
+    for layer, layer_layout in zip(net.layers, net.layout.layers):
+        np.testing.assert_array_equal(layer.weights[..., -1],
+                                      params[list(layer_layout.bias_positions)])
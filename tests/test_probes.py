@@ -0,0 +1,80 @@
+"""
+Tests for attaching `snn.probes.Probe` to an SNN.
+"""
+
+import numpy as np
+import pytest
+from snn.model_struct import SpikyNet
+from snn.probes import Probe
+
+
+def make_net():
+    """Returns a small vectorized SpikyNet batched over two SNNs."""
+    return SpikyNet(2, [3], 1, batch_shape=(2,))
+
+
+def test_unknown_layer_leaves_net_untouched():
+    net = make_net()
+    probe = Probe([(0, "hidden0", 1), (1, "hidden7", 0)])
+
+    with pytest.raises(ValueError):
+        probe.attach(net)
+
+    assert all(not layer.probes for layer in net.layers)
+    assert probe.layer_probes == []
+
+
+@pytest.mark.parametrize("targets, batch_shape", [
+    ([(0, "hidden0", 0), (9, "output", 0)], (4,)),
+    ([(0, "hidden0", 0), (-1, "output", 0)], (4,)),
+    ([(0, "hidden0", 0), (0, "output", 1)], (4,)),
+    ([(0, "hidden0", 0), (0, "hidden0", 3)], (4,)),
+    ([(0, "hidden0", 0), (1, "output", 0)], ()),
+])
+def test_out_of_range_target_leaves_net_untouched(targets, batch_shape):
+    net = SpikyNet(2, [3], 1, batch_shape=batch_shape)
+    probe = Probe(targets)
+
+    with pytest.raises(ValueError, match="Probe target"):
+        probe.attach(net)
+
+    assert all(not layer.probes for layer in net.layers)
+    assert probe.layer_probes == []
+
+
+def test_empty_signals_rejected():
+    with pytest.raises(ValueError):
+        Probe([(0, "output", 0)], signals=())
+
+
+def test_probe_records_targets():
+    net = make_net()
+    probe = Probe([(1, "hidden0", 2), (0, "output", 0)], max_steps=5)
+    probe.attach(net)
+    for inputs in np.random.default_rng(0).normal(size=(5, 2, 2)):
+        net.compute(inputs)
+
+    targets, values = probe.get_table(("level", "spike"))
+    assert targets == [(1, "hidden0", 2), (0, "output", 0)]
+    assert values.shape == (2, 2, 5)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_probe_duty_cycles_match_layer(dtype):
+    net = SpikyNet(2, [3], 1, batch_shape=(2,), dtype=dtype,
+                   rng=np.random.default_rng(0))
+    targets = [(snn_id, "hidden0", neuron) for snn_id in range(2)
+               for neuron in range(3)]
+    probe = Probe(targets, signals=("duty_cycle",), max_steps=30)
+    probe.attach(net)
+
+    expected = []
+    for inputs in np.random.default_rng(1).normal(1, 1, size=(30, 2, 2)):
+        net.compute(inputs)
+        expected.append(net.layers[0].duty_cycles().reshape(-1))
+
+    _, values = probe.get_table(("duty_cycle",))
+    assert values.any()
+    # Probes keep duty cycles in the layer's precision
+    np.testing.assert_array_equal(values[:, 0].T,
+                                  np.array(expected).astype(dtype))
@@ -0,0 +1,28 @@
+"""
+Tests for the running sums of `snn.ring_buffer`.
+"""
+
+import numpy as np
+import pytest
+from snn.ring_buffer import RingBuffer
+
+
+@pytest.mark.parametrize("dtype, values", [
+    (bool, [np.bool_(True), False, True, np.bool_(False), True, True, 1, 0]),
+    (np.int8, [1, 0.5, 2.7, -1, 127, 3, 0.9, 1]),
+    (float, [0.1, 0.2, 0.3, 1e-3, 2.5, -0.7, 0.4, 0.6]),
+])
+def test_sum_matches_stored_values(dtype, values):
+    buffer = RingBuffer(3, dtype=dtype)
+    # Three times around the buffer
+    for value in values * 3:
+        buffer.add(value)
+        assert buffer.sum() == pytest.approx(buffer.data.sum().item())
+
+
+def test_clear_resets_sum():
+    buffer = RingBuffer(2, dtype=np.int8)
+    buffer.add(5)
+    buffer.clear()
+    buffer.add(2)
+    assert buffer.sum() == 2
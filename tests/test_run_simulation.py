@@ -0,0 +1,56 @@
+"""
+Tests for `run_simulation.run` with a reused SNN controller.
+"""
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("run_kwargs", [
+    {"snn_logs": True, "log_filename": "unused.csv"},
+    {"spike_decay": 0.5},
+    {"snn_dtype": np.float32},
+])
+def test_mismatched_controller_rejected(run_kwargs):
+    pytest.importorskip("evogym")
+    from snn_sim import run_simulation
+
+    hidden_sizes = [2]
+    context = run_simulation.get_evaluation_context(hidden_sizes)
+    controller = run_simulation.build_controller(hidden_sizes, max_steps=10)
+    genome = np.zeros(context.layout.genome_length)
+
+    with pytest.raises(ValueError):
+        run_simulation.run(10,
+                           genome,
+                           "h",
+                           hidden_sizes,
+                           snn_controller=controller,
+                           context=context,
+                           **run_kwargs)
+
+
+def test_failed_rollout_detaches_statistics(monkeypatch):
+    pytest.importorskip("evogym")
+    from snn_sim import run_simulation
+
+    hidden_sizes = [2]
+    context = run_simulation.get_evaluation_context(hidden_sizes)
+    controller = run_simulation.build_controller(hidden_sizes, max_steps=10)
+    genome = np.zeros(context.layout.genome_length)
+
+    def fail(inputs):
+        raise RuntimeError("controller failed")
+
+    monkeypatch.setattr(controller, "get_lengths", fail)
+    with pytest.raises(RuntimeError):
+        run_simulation.run(10,
+                           genome,
+                           "h",
+                           hidden_sizes,
+                           snn_controller=controller,
+                           spike_stats=True,
+                           context=context)
+
+    assert controller.probes == []
+    assert all(not layer.probes for layer in controller.net.layers)
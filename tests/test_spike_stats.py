@@ -0,0 +1,122 @@
+"""
+Tests for the online spike statistics of `snn.spike_stats`.
+"""
+
+import os
+import numpy as np
+import pytest
+from snn.snn_controller import SNNController
+from snn.genome_layout import get_genome_layout
+from snn.spike_stats import SpikeStats
+
+ROBOT_PATH = os.path.join(os.path.dirname(__file__), '..', 'cmaes_framework',
+                          'snn_sim', 'robot', 'world_data', 'bestbot.json')
+HIDDEN_SIZES = [3]
+ISI_BINS = 6
+
+
+def run_controller(steps, stats, seed=0):
+    """
+    Runs a controller with full logs and `stats` attached on random inputs.
+
+    Returns:
+        SNNController: The controller, with its logs.
+    """
+    layout = get_genome_layout(ROBOT_PATH, "corners", HIDDEN_SIZES)
+    controller = SNNController(layout.inp_size,
+                               HIDDEN_SIZES,
+                               1,
+                               ROBOT_PATH,
+                               max_steps=steps,
+                               layout=layout)
+    rng = np.random.default_rng(seed)
+    controller.set_snn_weights(rng.normal(0, 1.5, layout.genome_length))
+    controller.add_probe(stats)
+    for inputs in rng.normal(0.3, 0.5, (steps, layout.num_snn, layout.inp_size)):
+        controller.get_lengths(inputs)
+    return controller
+
+
+@pytest.mark.parametrize("steps", [1, 63, 64, 200])
+def test_summary_matches_full_logs(steps):
+    stats = SpikeStats(isi_bins=ISI_BINS, chunk_steps=64)
+    controller = run_controller(steps, stats)
+    summary = stats.summary()
+
+    assert set(summary) == set(controller.net.layer_names)
+    for name, layer in zip(controller.net.layer_names, controller.net.layers):
+        levels = layer.log.get_levels()
+        fires = layer.log.get_fires().astype(bool)
+        duty_cycles = layer.log.get_duty_cycles()
+        layer_summary = summary[name]
+
+        assert layer_summary["steps"] == steps
+        np.testing.assert_array_equal(layer_summary["spike_count"],
+                                      fires.sum(axis=0))
+        np.testing.assert_array_equal(layer_summary["firing_rate"],
+                                      fires.sum(axis=0) / steps)
+        np.testing.assert_array_equal(layer_summary["level_min"],
+                                      levels.min(axis=0))
+        np.testing.assert_array_equal(layer_summary["level_max"],
+                                      levels.max(axis=0))
+        np.testing.assert_allclose(layer_summary["level_mean"],
+                                   levels.mean(axis=0))
+
+        for snn_id in range(fires.shape[1]):
+            for neuron in range(fires.shape[2]):
+                intervals = np.diff(np.flatnonzero(fires[:, snn_id, neuron]))
+                histogram = np.bincount(np.minimum(intervals, ISI_BINS) - 1,
+                                        minlength=ISI_BINS)
+                np.testing.assert_array_equal(
+                    layer_summary["isi_histogram"][snn_id, neuron], histogram)
+                np.testing.assert_array_equal(
+                    layer_summary["duty_cycle_percentiles"][snn_id, neuron],
+                    np.percentile(duty_cycles[:, snn_id, neuron],
+                                  stats.percentiles,
+                                  method="inverted_cdf"))
+
+
+def test_summary_has_activity():
+    stats = SpikeStats(isi_bins=ISI_BINS)
+    run_controller(200, stats)
+    summary = stats.summary()
+
+    for layer_summary in summary.values():
+        assert layer_summary["spike_count"].sum() > 0
+        assert layer_summary["isi_histogram"].sum() > 0
+        np.testing.assert_array_equal(
+            layer_summary["isi_histogram"].sum(axis=-1),
+            np.maximum(layer_summary["spike_count"] - 1, 0))
+        assert 0 < layer_summary["firing_rate"].max() <= 1
+
+
+def test_run_returns_layer_statistics():
+    pytest.importorskip("evogym")
+    from snn_sim import run_simulation
+
+    hidden_sizes = [2]
+    steps = 100
+    context = run_simulation.get_evaluation_context(hidden_sizes)
+    genome = np.random.default_rng(0).normal(0, 100,
+                                             context.layout.genome_length)
+    fitness, summary = run_simulation.run(steps,
+                                          genome,
+                                          "h",
+                                          hidden_sizes,
+                                          spike_stats=True,
+                                          context=context)
+
+    assert np.isfinite(fitness)
+    assert set(summary) == {"hidden0", "output"}
+    for layer_summary in summary.values():
+        assert layer_summary["steps"] == steps
+        assert layer_summary["spike_count"].shape == (
+            context.layout.num_snn, layer_summary["spike_count"].shape[-1])
+        np.testing.assert_array_equal(layer_summary["firing_rate"],
+                                      layer_summary["spike_count"] / steps)
+        # Every spike after a neuron's first ends one interval
+        spike_count = layer_summary["spike_count"]
+        np.testing.assert_array_equal(
+            layer_summary["isi_histogram"].sum(axis=-1),
+            np.maximum(spike_count - 1, 0))
+    assert summary["output"]["spike_count"].sum() > 0